@@ -3,6 +3,8 @@ from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
 
 from .config import config_by_name
+from .util.http_client import init_http_session
+from .util.redis_client import init_redis_connection_pool
 
 db: SQLAlchemy = SQLAlchemy()
 flask_bcrypt = Bcrypt()
@@ -14,5 +16,7 @@ def create_app() -> Flask:
     app.config.from_object(config_by_name["prod"])
     db.init_app(app)
     flask_bcrypt.init_app(app)
+    init_http_session(app)
+    init_redis_connection_pool(app)
 
     return app
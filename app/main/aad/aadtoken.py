@@ -2,16 +2,26 @@
 # original article available at: http://www.igeorgiev.eu/python/misc/python-azure-ad-token-decode-validate/
 
 import logging
-import functools
 import base64
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+import threading
+import time
+from typing import Dict
+
+import gevent
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPublicNumbers
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 import requests
 import jwt
+from flask import current_app, has_app_context
+from flask.app import Flask
+
+from ..util.http_client import get_http_session
 
 OID_DISCOVERY_COMMON_URL = 'https://login.microsoftonline.com/common/.well-known/openid-configuration'
 OID_DISCOVERY_TENANT_URL = 'https://login.microsoftonline.com/{tenant_id}/.well-known/openid-configuration'
+_DEFAULT_JWKS_REFRESH_SECONDS = 3600
+_DEFAULT_JWKS_MIN_REFETCH_SECONDS = 60
 
 
 class TokenError(Exception):
@@ -37,11 +47,15 @@ def decode_value(val):
     return int.from_bytes(decoded, 'big')
 
 
-def rsa_pem_from_jwk(jwk):
+def rsa_public_key_from_jwk(jwk) -> RSAPublicKey:
     return RSAPublicNumbers(
         n=decode_value(jwk['n']),
         e=decode_value(jwk['e'])
-    ).public_key(default_backend()).public_bytes(
+    ).public_key(default_backend())
+
+
+def rsa_pem_from_jwk(jwk):
+    return rsa_public_key_from_jwk(jwk).public_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo
     )
@@ -51,7 +65,7 @@ def _fetch_discovery_meta(tenant_id=None):
     discovery_url = OID_DISCOVERY_TENANT_URL.format(
         tenant_id=tenant_id) if tenant_id else OID_DISCOVERY_COMMON_URL
     try:
-        response = requests.get(discovery_url)
+        response = get_http_session().get(discovery_url)
         response.raise_for_status()
     except requests.exceptions.HTTPError as err:
         logging.debug(response.text)
@@ -78,11 +92,10 @@ def get_jwks_uri(tenant_id=None):
         raise CommunicationError('jwks_uri not found in the issuer meta')
 
 
-@functools.lru_cache
 def get_jwks(tenant_id=None):
     jwks_uri = get_jwks_uri(tenant_id)
     try:
-        response = requests.get(jwks_uri)
+        response = get_http_session().get(jwks_uri)
         response.raise_for_status()
     except requests.exceptions.HTTPError as err:
         logging.debug(response.text)
@@ -91,14 +104,149 @@ def get_jwks(tenant_id=None):
     return response.json()
 
 
+class JwksManager:
+    """
+    Keeps the signing keys of an issuer loaded and up to date.
+
+    Keys are refreshed every ``refresh_seconds``, by the background refresher when it runs or otherwise by the first
+    request finding them stale, which keeps serving the current keys meanwhile. A token signed with an unknown kid,
+    as after a key rotation, triggers one immediate refetch, at most once every ``min_refetch_seconds``. Only one
+    fetch runs at a time, concurrent requests wait for it instead of fetching themselves.
+    """
+
+    def __init__(self, tenant_id=None, refresh_seconds: float = _DEFAULT_JWKS_REFRESH_SECONDS,
+                 min_refetch_seconds: float = _DEFAULT_JWKS_MIN_REFETCH_SECONDS):
+        self.tenant_id = tenant_id
+        self.refresh_seconds = refresh_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+        self._jwks: Dict[str, dict] = {}
+        self._public_keys: Dict[str, RSAPublicKey] = {}
+        self._fetched_at = None
+        self._last_fetch_attempt = None
+        self._fetch_lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """
+        Fetch the keys of the issuer and replace the loaded ones.
+        """
+        with self._fetch_lock:
+            self._fetch()
+
+    def _fetch(self) -> None:
+        self._last_fetch_attempt = time.monotonic()
+        jwks = {jwk['kid']: jwk for jwk in get_jwks(self.tenant_id).get('keys') if 'kid' in jwk}
+        public_keys = {}
+        for kid, jwk in jwks.items():
+            try:
+                public_keys[kid] = rsa_public_key_from_jwk(jwk)
+            except (KeyError, ValueError) as e:
+                logging.info(f"Skipping jwk {kid} which is not an RSA key: {e}")
+        self._jwks, self._public_keys = jwks, public_keys
+        self._fetched_at = time.monotonic()
+        logging.info(f"Loaded {len(public_keys)} signing keys for tenant {self.tenant_id or 'common'}")
+
+    def _refetch_for_unknown_kid(self, kid) -> None:
+        with self._fetch_lock:
+            # another request fetched the keys while this one waited
+            if kid in self._public_keys:
+                return
+            if self._last_fetch_attempt is not None and \
+                    time.monotonic() - self._last_fetch_attempt < self.min_refetch_seconds:
+                return
+            self._fetch()
+
+    def _refresh_if_stale(self) -> None:
+        if self._fetched_at is not None and time.monotonic() - self._fetched_at < self.refresh_seconds:
+            return
+        if not self._public_keys:
+            with self._fetch_lock:
+                # another request loaded the keys while this one waited
+                if not self._public_keys:
+                    self._fetch()
+        elif self._fetch_lock.acquire(blocking=False):
+            # stale, keep serving the current keys while one request refreshes them in the background
+            def refresh():
+                try:
+                    self._fetch()
+                except Exception as e:
+                    logging.error(f"Refreshing signing keys failed: {e}")
+                finally:
+                    self._fetch_lock.release()
+            threading.Thread(target=refresh, daemon=True).start()
+
+    def get_jwk(self, kid) -> dict:
+        self.get_public_key(kid)
+        return self._jwks[kid]
+
+    def get_public_key(self, kid) -> RSAPublicKey:
+        """
+        Get the loaded public key of a kid, refetching the keys once if the kid is unknown.
+
+        :raises InvalidToken: If the issuer has no key with this kid
+        """
+        self._refresh_if_stale()
+        public_key = self._public_keys.get(kid)
+        if public_key is None:
+            self._refetch_for_unknown_kid(kid)
+            public_key = self._public_keys.get(kid)
+        if public_key is None:
+            raise InvalidToken('Unknown kid')
+        return public_key
+
+    def start_background_refresh(self) -> gevent.Greenlet:
+        """
+        Load the keys now and start a greenlet refreshing them every ``refresh_seconds``.
+
+        :return: The refresher greenlet
+        """
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error(f"Refreshing signing keys failed: {e}")
+                    gevent.sleep(self.min_refetch_seconds)
+                    continue
+                gevent.sleep(self.refresh_seconds)
+
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.error(f"Loading signing keys at startup failed: {e}")
+        return gevent.spawn_later(self.refresh_seconds, run)
+
+
+_jwks_managers: Dict[str, JwksManager] = {}
+_jwks_managers_lock = threading.Lock()
+
+
+def get_jwks_manager(tenant_id=None) -> JwksManager:
+    with _jwks_managers_lock:
+        if tenant_id not in _jwks_managers:
+            if has_app_context():
+                _jwks_managers[tenant_id] = JwksManager(
+                    tenant_id, refresh_seconds=current_app.config["AD_JWKS_REFRESH_SECONDS"],
+                    min_refetch_seconds=current_app.config["AD_JWKS_MIN_REFETCH_SECONDS"])
+            else:
+                _jwks_managers[tenant_id] = JwksManager(tenant_id)
+        return _jwks_managers[tenant_id]
+
+
+def start_jwks_refresher(app: Flask, tenant_id=None) -> gevent.Greenlet:
+    """
+    Warm up the signing keys of the issuer and keep refreshing them in the background.
+
+    :param app: Flask app holding the AD_JWKS_* configuration
+    :param tenant_id: Tenant of the issuer, None for the common endpoint tokens are verified against
+    :return: The refresher greenlet
+    """
+    with app.app_context():
+        return get_jwks_manager(tenant_id).start_background_refresh()
+
+
 def get_jwk(kid, tenant_id=None):
-    for jwk in get_jwks(tenant_id).get('keys'):
-        if jwk.get('kid') == kid:
-            return jwk
-    raise InvalidToken('Unknown kid')
+    return get_jwks_manager(tenant_id).get_jwk(kid)
 
 
-def get_public_key(token, tenant_id=None):
-    kid = get_kid(token)
-    jwk = get_jwk(kid, tenant_id)
-    return rsa_pem_from_jwk(jwk)
\ No newline at end of file
+def get_public_key(token, tenant_id=None) -> RSAPublicKey:
+    return get_jwks_manager(tenant_id).get_public_key(get_kid(token))
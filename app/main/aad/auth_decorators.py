@@ -1,5 +1,9 @@
+import hashlib
 import jwt
 import logging
+import threading
+import time
+from cachetools import TLRUCache
 from flask import current_app
 from functools import wraps
 from inspect import getfullargspec
@@ -10,6 +14,21 @@ from .aadtoken import get_public_key
 
 load_dotenv()
 
+_verified_claims_cache: TLRUCache = None
+_verified_claims_cache_lock = threading.Lock()
+
+
+def _get_verified_claims_cache() -> TLRUCache:
+    global _verified_claims_cache
+    if _verified_claims_cache is None:
+        max_ttl = current_app.config["AD_TOKEN_CACHE_TTL_SECONDS"]
+        # an entry never outlives the token it was verified from
+        _verified_claims_cache = TLRUCache(
+            maxsize=current_app.config["AD_TOKEN_CACHE_MAX_ENTRIES"],
+            ttu=lambda _, claims, now: min(float(claims.get("exp", now)), now + max_ttl),
+            timer=time.time)
+    return _verified_claims_cache
+
 
 class AuthDecorator:
     def __init__(self):
@@ -18,7 +37,22 @@ class AuthDecorator:
     def auth_token(self, token: str) -> dict:
         """
         Validates a JWT token and returns the payload
+
+        Claims of verified tokens are cached until the token expires, so repeated requests with the same token skip
+        the signature verification. The audience and issuer are part of the cache key, a token verified against
+        different ones is verified again.
         """
+        cache_key = (hashlib.sha256(token.encode()).hexdigest(), self.client_id, self.issuer)
+        with _verified_claims_cache_lock:
+            claims = _get_verified_claims_cache().get(cache_key)
+        if claims is not None:
+            return claims
+        claims = self._verify_token(token)
+        with _verified_claims_cache_lock:
+            _get_verified_claims_cache()[cache_key] = claims
+        return claims
+
+    def _verify_token(self, token: str) -> dict:
         try:
             public_key = get_public_key(token)
             decoded = jwt.api_jwt.decode_complete(
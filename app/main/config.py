@@ -29,18 +29,59 @@ class ProductionConfig(Config):
     STAC_GENERATOR_ENDPOINT = os.getenv("STAC_GENERATOR_ENDPOINT")
     AZURE_STORAGE_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS = os.getenv("AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS")
+    SAS_TOKENS_MAX_BLOBS = int(os.getenv("SAS_TOKENS_MAX_BLOBS", "1000"))
     REDIS_HOST = os.getenv("REDIS_HOST")
     REDIS_PORT = int(os.getenv("REDIS_PORT"))
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "100"))
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "20"))
     AD_CLIENT_ID = os.getenv("AD_CLIENT_ID")
     AD_TENANT_ID = os.getenv("AD_TENANT_ID")
     AD_ENABLE_AUTH = bool(ast.literal_eval(os.getenv("AD_ENABLE_AUTH", "True")))  # set default to true not to break
+    AD_JWKS_REFRESH_SECONDS = int(os.getenv("AD_JWKS_REFRESH_SECONDS", "3600"))
+    AD_JWKS_MIN_REFETCH_SECONDS = int(os.getenv("AD_JWKS_MIN_REFETCH_SECONDS", "60"))
+    AD_TOKEN_CACHE_TTL_SECONDS = int(os.getenv("AD_TOKEN_CACHE_TTL_SECONDS", "300"))
+    AD_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AD_TOKEN_CACHE_MAX_ENTRIES", "10000"))
     # existing deployments
     APIM_CONFIG_APIM_TENANT_ID = os.getenv("APIM_CONFIG_APIM_TENANT_ID")
     APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_ID = os.getenv("APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_ID")
     APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_SECRET = os.getenv("APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_SECRET")
     APIM_CONFIG_APIM_SUBSCRIPTION_ID = os.getenv("APIM_CONFIG_APIM_SUBSCRIPTION_ID")
     APIM_CONFIG_APIM_RESOURCE_GROUP_NAME = os.getenv("APIM_CONFIG_APIM_RESOURCE_GROUP_NAME")
+    APIM_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("APIM_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+    APIM_SECRETS_CACHE_TTL_SECONDS = int(os.getenv("APIM_SECRETS_CACHE_TTL_SECONDS", "300"))
     APIM_CONFIG_APIM_NAME = os.getenv("APIM_CONFIG_APIM_NAME")
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "100"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "50"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_RETRY_BACKOFF_FACTOR = float(os.getenv("HTTP_RETRY_BACKOFF_FACTOR", "0.5"))
+    STAC_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("STAC_RESPONSE_CACHE_TTL_SECONDS", "30"))
+    STAC_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("STAC_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    STAC_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("STAC_RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    FAN_OUT_MAX_CONCURRENCY = int(os.getenv("FAN_OUT_MAX_CONCURRENCY", "100"))
+    FAN_OUT_MAX_PER_HOST = int(os.getenv("FAN_OUT_MAX_PER_HOST", "4"))
+    FAN_OUT_DEADLINE_SECONDS = float(os.getenv("FAN_OUT_DEADLINE_SECONDS", "20"))
+    PUBLIC_COLLECTIONS_HARVEST_INTERVAL_SECONDS = int(os.getenv("PUBLIC_COLLECTIONS_HARVEST_INTERVAL_SECONDS", "3600"))
+    PUBLIC_COLLECTIONS_HARVEST_RETRY_SECONDS = int(os.getenv("PUBLIC_COLLECTIONS_HARVEST_RETRY_SECONDS", "300"))
+    PUBLIC_COLLECTIONS_HARVEST_DEADLINE_SECONDS = float(os.getenv("PUBLIC_COLLECTIONS_HARVEST_DEADLINE_SECONDS", "300"))
+    STAC_INGESTION_RESULTS_BATCH_SIZE = int(os.getenv("STAC_INGESTION_RESULTS_BATCH_SIZE", "500"))
+    STAC_INGESTION_RESULTS_IDLE_TIMEOUT_SECONDS = int(os.getenv("STAC_INGESTION_RESULTS_IDLE_TIMEOUT_SECONDS", "5"))
+    STAC_INGESTION_EVENTS_HEARTBEAT_SECONDS = int(os.getenv("STAC_INGESTION_EVENTS_HEARTBEAT_SECONDS", "15"))
+    INGESTION_DISPATCH_MAX_QUEUED = int(os.getenv("INGESTION_DISPATCH_MAX_QUEUED", "10"))
+    INGESTION_DISPATCH_INTERVAL_SECONDS = float(os.getenv("INGESTION_DISPATCH_INTERVAL_SECONDS", "2"))
+    STAC_INGESTION_IN_FLIGHT_TTL_SECONDS = int(os.getenv("STAC_INGESTION_IN_FLIGHT_TTL_SECONDS", "21600"))
+    STAC_INGESTION_STATUS_RETENTION_DAYS = int(os.getenv("STAC_INGESTION_STATUS_RETENTION_DAYS", "90"))
+    STAC_INGESTION_STATUS_COMPACTION_BATCH_SIZE = int(os.getenv("STAC_INGESTION_STATUS_COMPACTION_BATCH_SIZE", "1000"))
+    PUBLIC_CATALOGS_SYNC_CONCURRENCY = int(os.getenv("PUBLIC_CATALOGS_SYNC_CONCURRENCY", "20"))
+    PUBLIC_CATALOGS_SYNC_TIMEOUT_SECONDS = float(os.getenv("PUBLIC_CATALOGS_SYNC_TIMEOUT_SECONDS", "10"))
+    PUBLIC_CATALOGS_SYNC_REVALIDATE_AFTER_HOURS = float(os.getenv("PUBLIC_CATALOGS_SYNC_REVALIDATE_AFTER_HOURS", "24"))
+    PUBLIC_CATALOG_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("PUBLIC_CATALOG_CIRCUIT_FAILURE_THRESHOLD", "3"))
+    PUBLIC_CATALOG_CIRCUIT_OPEN_SECONDS = int(os.getenv("PUBLIC_CATALOG_CIRCUIT_OPEN_SECONDS", "300"))
+    PUBLIC_CATALOG_CACHE_TTL_SECONDS = int(os.getenv("PUBLIC_CATALOG_CACHE_TTL_SECONDS", "3600"))
+    PUBLIC_CATALOG_CACHE_STALE_TTL_SECONDS = int(os.getenv("PUBLIC_CATALOG_CACHE_STALE_TTL_SECONDS", "86400"))
+    PUBLIC_CATALOG_CACHE_L1_TTL_SECONDS = int(os.getenv("PUBLIC_CATALOG_CACHE_L1_TTL_SECONDS", "60"))
+    PUBLIC_CATALOG_LOOKUP_CACHE_TTL_SECONDS = int(os.getenv("PUBLIC_CATALOG_LOOKUP_CACHE_TTL_SECONDS", "30"))
 
 
 config_by_name = dict(
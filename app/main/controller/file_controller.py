@@ -1,4 +1,6 @@
-from flask import request
+from typing import List
+
+from flask import current_app, request
 from flask_restx import Resource
 from werkzeug.utils import secure_filename
 
@@ -8,6 +10,8 @@ from ..util.dto import FileDto
 
 auth_decorator = AuthDecorator()
 
+_SAS_TOKENS_WRITE_ROLES = ["StacPortal.Creator"]
+
 api = FileDto.api
 
 
@@ -40,4 +44,49 @@ class GetReadSasToken(Resource):
         return {"sas_token": sas_token,
                 "endpoint": endpoint,
                 "endpoint_without_sas_token": endpoint_without_sas_token
-                }, 200
\ No newline at end of file
+                }, 200
+
+
+@api.route("/sas_tokens/")
+class GetSasTokens(Resource):
+    @api.doc(description="Get SAS tokens for a list of blobs")
+    @api.expect(FileDto.sas_tokens, validate=True)
+    @api.response(200, "Success")
+    @api.response(400, "Too many or no blobs")
+    @api.response(401, "Write tokens requested without the StacPortal.Creator role")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def post(self, roles: List[str] = None):
+        # roles is only passed when authentication is enabled
+        if request.json["permission"] == SAS_PERMISSION_WRITE and roles is not None \
+                and not any(role in _SAS_TOKENS_WRITE_ROLES for role in roles):
+            return {"message": "Role not allowed"}, 401
+        filenames = request.json["filenames"]
+        max_blobs = current_app.config["SAS_TOKENS_MAX_BLOBS"]
+        if not filenames or len(filenames) > max_blobs:
+            return {"message": f"Between 1 and {max_blobs} filenames are required"}, 400
+
+        return {"sas_tokens": get_sas_tokens(filenames, request.json["permission"])}, 200
+
+
+@api.route("/sas_token_container/")
+class GetContainerSasToken(Resource):
+    @api.doc(description="Get a SAS token valid for every blob in the container for an hour. Read tokens can also list "
+                         "the container, write tokens can create and overwrite any blob in it.",
+             params={"permission": "read or write"})
+    @api.response(200, "Success")
+    @api.response(400, "Invalid permission")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Creator"]
+    )
+    def get(self):
+        permission = request.args.get("permission", SAS_PERMISSION_READ)
+        if permission not in SAS_PERMISSIONS:
+            return {"message": f"permission must be one of {','.join(SAS_PERMISSIONS)}"}, 400
+        sas_token, endpoint, endpoint_without_sas_token = get_container_sas_token(permission)
+
+        return {"sas_token": sas_token,
+                "endpoint": endpoint,
+                "endpoint_without_sas_token": endpoint_without_sas_token
+                }, 200
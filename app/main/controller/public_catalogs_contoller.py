@@ -15,14 +15,37 @@ api = PublicCatalogsDto.api
 
 @api.route("/")
 class PublicCatalogs(Resource):
-    @api.doc(description="""Get all public catalogs stored in the database.""")
+    @api.doc(description="""Get all public catalogs stored in the database.""",
+             params={"page": "Page to return, starting at 1",
+                     "per_page": "Number of catalogs per page, the first page is returned when page is not given",
+                     "fields": "Comma separated fields to return, e.g. id,name,url",
+                     "include_search_parameters": "Include the stored search parameters of each catalog "
+                                                  "(true/false, default true)"})
     @api.doc("List all public catalogs in the database")
     @api.response(200, "Success")
+    @api.response(400, "Invalid pagination or fields")
     @auth_decorator.header_decorator(
         allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
     )
     def get(self):
-        return public_catalogs_service.get_all_stored_public_catalogs()
+        try:
+            page = int(request.args["page"]) if "page" in request.args else None
+            per_page = int(request.args["per_page"]) if "per_page" in request.args else None
+        except ValueError:
+            return {"message": "page and per_page must be integers"}, 400
+        fields = request.args.get("fields")
+        include_search_parameters = request.args.get("include_search_parameters", "true").lower() == "true"
+        if per_page is not None and page is None:
+            page = 1
+        if page is not None and (page < 1 or per_page is None or per_page < 1):
+            return {"message": "page must be at least 1 and used together with a positive per_page"}, 400
+        if fields is not None:
+            fields = [i.strip() for i in fields.split(",") if i.strip()]
+            allowed_fields = ["id", "name", "url", "description", "added_on", "stored_search_parameters"]
+            if any(i not in allowed_fields for i in fields):
+                return {"message": f"fields must be a subset of {','.join(allowed_fields)}"}, 400
+        return public_catalogs_service.get_all_stored_public_catalogs(page, per_page, fields,
+                                                                      include_search_parameters)
 
     @api.doc(description="Store a new public catalog in the database")
     @api.expect(PublicCatalogsDto.add_public_catalog, validate=True)
@@ -66,6 +89,17 @@ class PublicCatalogs(Resource):
         return {"message": "Deleted all catalogs"}, 200
 
 
+@api.route("/health/")
+class PublicCatalogsHealth(Resource):
+    @api.doc(description="Get latency, error rate, last success and circuit state of every public catalog")
+    @api.response(200, "Success")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self):
+        return public_catalogs_service.get_public_catalogs_health(), 200
+
+
 @api.route("/<int:public_catalog_id>/")
 class GetPublicCatalogViaCatalogId(Resource):
     @api.doc(description="""Get the details of a public catalog by its id.""")
@@ -306,8 +340,23 @@ class PublicCatalogsUpdate(Resource):
         allowed_roles=["StacPortal.Creator"]
     )
     def get(self):
-        public_catalogs_service.store_publicly_available_catalogs()
-        return {"message": "Sync operation started"}, 200
+        sync_job_id = public_catalogs_service.store_publicly_available_catalogs()
+        return {"message": "Sync operation started", "sync_job_id": sync_job_id}, 200
+
+
+@api.route("/sync/<int:sync_job_id>/")
+class PublicCatalogsSyncJob(Resource):
+    @api.doc(description="Get the progress of a sync operation and the outcome of every catalog it processed")
+    @api.response(200, "Success")
+    @api.response(404, "Sync operation not found")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self, sync_job_id):
+        try:
+            return public_catalogs_service.get_public_catalogs_sync_job(sync_job_id), 200
+        except CatalogSyncJobDoesNotExistError:
+            return {"message": "Sync operation with this id does not exist"}, 404
 
 
 @api.route("/run_search_parameters/<int:parameter_id>/")
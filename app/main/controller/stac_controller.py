@@ -3,7 +3,7 @@ from flask_restx import Resource
 from ..aad.auth_decorators import AuthDecorator
 from ..service.stac_service import *
 from ..util.dto import StacDto
-from flask import request
+from flask import Response, request, stream_with_context
 
 auth_decorator = AuthDecorator()
 
@@ -55,15 +55,46 @@ class Collection(Resource):
 @api.route("/collections/<collection_id>/items/")
 class CollectionItems(Resource):
 
-    @api.doc(description="Get all items from collection")
+    @api.doc(description="Get items from collection. By default a single page is returned, use all_pages to "
+                         "stream every item of the collection",
+             params={"limit": "Number of items per page",
+                     "token": "Pagination token of the page to return",
+                     "bbox": "Comma separated bounding box filter",
+                     "datetime": "Datetime filter",
+                     "all_pages": "Stream every page of the collection (true/false)",
+                     "format": "Format of the streamed items, geojson (default) or ndjson"})
     @api.response(200, "Success")
+    @api.response(400, "Invalid limit, bbox or format")
     @api.response(404, "Collection not found")
     @auth_decorator.header_decorator(
         allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
     )
     def get(self, collection_id: str) -> Tuple[Dict[str, str], int]:
         try:
-            return get_items_by_collection_id(collection_id), 200
+            limit = int(request.args["limit"]) if "limit" in request.args else None
+            if limit is not None and limit < 1:
+                raise ValueError
+        except ValueError:
+            return {"message": "limit must be a positive integer"}, 400
+        bbox = request.args.get("bbox")
+        if bbox is not None:
+            try:
+                if len([float(i) for i in bbox.split(",")]) not in (4, 6):
+                    raise ValueError
+            except ValueError:
+                return {"message": "bbox must be 4 or 6 comma separated numbers"}, 400
+        output_format = request.args.get("format", "geojson")
+        if output_format not in ITEM_STREAM_FORMATS:
+            return {"message": f"format must be one of {','.join(ITEM_STREAM_FORMATS)}"}, 400
+        datetime = request.args.get("datetime")
+        try:
+            if request.args.get("all_pages", "false").lower() == "true":
+                chunks = stream_items_by_collection_id(collection_id, limit=limit, bbox=bbox, datetime=datetime,
+                                                       output_format=output_format)
+                mimetype = "application/x-ndjson" if output_format == "ndjson" else "application/geo+json"
+                return Response(stream_with_context(chunks), mimetype=mimetype)
+            return get_items_by_collection_id(collection_id, limit=limit, token=request.args.get("token"),
+                                              bbox=bbox, datetime=datetime), 200
         except CollectionDoesNotExistError:
             return {
                        "message": "Collection with this ID not found",
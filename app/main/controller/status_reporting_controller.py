@@ -1,7 +1,10 @@
 import sqlalchemy
+from flask import Response, request
 from flask_restx import Resource
 
 from ..aad.auth_decorators import AuthDecorator
+from ..custom_exceptions import *
+from ..service import ingestion_scheduler_service
 from ..service import status_reporting_service
 from ..util.dto import StatusReportingDto
 
@@ -10,14 +13,123 @@ auth_decorator = AuthDecorator()
 api = StatusReportingDto.api
 
 
+def _get_update_arg():
+    update = request.args.get("update")
+    if update is None:
+        return None
+    return update.lower() == "true"
+
+
 @api.route('/loading_public_stac_records/')
 class StacIngestionStatus(Resource):
-    @api.doc(description='Get all statuses of stac ingestion statuses')
+    @api.doc(description='Get statuses of stac ingestions, newest first. The cursor of the next page is returned in '
+                         'the X-Next-Cursor header.',
+             params={"limit": "Maximum number of statuses to return (default 100, at most 1000)",
+                     "cursor": "Value of the X-Next-Cursor header of the previous page",
+                     "source_stac_api_url": "Only return ingestions from this public catalog url",
+                     "datetime": "Only return ingestions started in this interval, e.g. "
+                                 "2023-01-01T00:00:00Z/..",
+                     "state": "Only return ingestions in this state: running, finished or errored",
+                     "update": "Only return updates (true) or first loads (false)"})
+    @api.response(200, "Success")
+    @api.response(400, "Invalid filter")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self):
+        try:
+            limit = int(request.args["limit"]) if "limit" in request.args else None
+        except ValueError:
+            return {'message': 'limit must be an integer'}, 400
+        try:
+            cursor = int(request.args["cursor"]) if "cursor" in request.args else None
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400
+        try:
+            statuses, next_cursor = status_reporting_service.get_all_stac_ingestion_statuses(
+                limit=limit,
+                cursor=cursor,
+                source_stac_api_url=request.args.get("source_stac_api_url"),
+                time_interval_timestamp=request.args.get("datetime"),
+                state=request.args.get("state"),
+                update=_get_update_arg())
+        except ConvertingTimestampError as e:
+            return {'message': f'Error converting timestamp: {e}'}, 400
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+        return statuses, 200, headers
+
+
+@api.route('/loading_public_stac_records/summary/')
+class StacIngestionStatusSummary(Resource):
+    @api.doc(description='Count stac ingestions by state',
+             params={"source_stac_api_url": "Only count ingestions from this public catalog url",
+                     "datetime": "Only count ingestions started in this interval, e.g. 2023-01-01T00:00:00Z/..",
+                     "update": "Only count updates (true) or first loads (false)"})
+    @api.response(200, "Success")
+    @api.response(400, "Invalid filter")
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self):
+        try:
+            return status_reporting_service.get_stac_ingestion_statuses_summary(
+                source_stac_api_url=request.args.get("source_stac_api_url"),
+                time_interval_timestamp=request.args.get("datetime"),
+                update=_get_update_arg()), 200
+        except ConvertingTimestampError as e:
+            return {'message': f'Error converting timestamp: {e}'}, 400
+
+
+@api.route('/ingestion_queue/')
+class IngestionQueue(Resource):
+    @api.doc(description='Get depth and wait times of the ingestion queue of each priority class')
     @auth_decorator.header_decorator(
         allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
     )
     def get(self):
-        return status_reporting_service.get_all_stac_ingestion_statuses()
+        return ingestion_scheduler_service.get_ingestion_queue_stats()
+
+
+@api.route('/loading_public_stac_records/daily_summaries/')
+class StacIngestionStatusDailySummaries(Resource):
+    @api.doc(description='Get daily per-catalog counts of stac ingestions compacted out of the status history',
+             params={"source_stac_api_url": "Only return summaries of this public catalog url"})
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self):
+        return status_reporting_service.get_stac_ingestion_daily_summaries(
+            source_stac_api_url=request.args.get("source_stac_api_url"))
+
+
+@api.route('/loading_public_stac_records/events/')
+class StacIngestionStatusEvents(Resource):
+    @api.doc(description='Stream state transitions of all stac ingestions as Server-Sent Events. The Authorization '
+                         'header is required, so browsers have to read the stream with fetch instead of EventSource.')
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self):
+        return Response(status_reporting_service.stream_stac_ingestion_status_events(),
+                        mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@api.route('/loading_public_stac_records/<int:status_id>/events/')
+class StacIngestionStatusEventsViaId(Resource):
+    @api.doc(description='Stream state transitions of a stac ingestion as Server-Sent Events until it is finished. The '
+                         'Authorization header is required, so browsers have to read the stream with fetch instead of '
+                         'EventSource.')
+    @auth_decorator.header_decorator(
+        allowed_roles=["StacPortal.Viewer", "StacPortal.Creator"]
+    )
+    def get(self, status_id):
+        try:
+            return Response(status_reporting_service.stream_stac_ingestion_status_events(status_id),
+                            mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+        except AttributeError:
+            return {'message': 'No result found'}, 404
 
 
 @api.route('/loading_public_stac_records/<string:status_id>/')
@@ -16,6 +16,14 @@ class PublicCatalogDoesNotExistError(CatalogDoesNotExistError):
     pass
 
 
+class PublicCatalogCircuitOpenError(Error):
+    pass
+
+
+class CatalogSyncJobDoesNotExistError(Error):
+    pass
+
+
 class CatalogAlreadyExistsError(Error):
     pass
 
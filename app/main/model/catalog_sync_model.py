@@ -0,0 +1,50 @@
+import datetime
+
+from .. import db
+
+
+class CatalogSyncJob(db.Model):
+    __tablename__ = "catalog_sync_jobs"
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    time_started: datetime.datetime = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    time_finished: datetime.datetime = db.Column(db.DateTime, nullable=True)
+    status: str = db.Column(db.Text, nullable=False, default="running")
+    error_message: str = db.Column(db.Text, nullable=True, default="")
+    total_count: int = db.Column(db.Integer, nullable=False, default=0)
+    processed_count: int = db.Column(db.Integer, nullable=False, default=0)
+    stored_count: int = db.Column(db.Integer, nullable=False, default=0)
+    already_stored_count: int = db.Column(db.Integer, nullable=False, default=0)
+    skipped_count: int = db.Column(db.Integer, nullable=False, default=0)
+    invalid_count: int = db.Column(db.Integer, nullable=False, default=0)
+    failed_count: int = db.Column(db.Integer, nullable=False, default=0)
+    results = db.relationship("CatalogSyncResult", backref="catalog_sync_jobs", lazy="dynamic",
+                              cascade="all, delete-orphan")
+
+    def as_dict(self):
+        return {
+            c.name: str(getattr(self, c.name))
+            for c in self.__table__.columns
+        }
+
+
+class CatalogSyncResult(db.Model):
+    __tablename__ = "catalog_sync_results"
+    __table_args__ = (
+        db.Index("ix_catalog_sync_results_url_validated_on", "url", "validated_on"),
+    )
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id: int = db.Column(db.Integer,
+                            db.ForeignKey('catalog_sync_jobs.id', ondelete='CASCADE'),
+                            nullable=False,
+                            index=True)
+    url: str = db.Column(db.Text, nullable=False)
+    title: str = db.Column(db.Text, nullable=True)
+    outcome: str = db.Column(db.Text, nullable=False)
+    message: str = db.Column(db.Text, nullable=True, default="")
+    validated_on: datetime.datetime = db.Column(db.DateTime, nullable=True)
+
+    def as_dict(self):
+        return {
+            c.name: str(getattr(self, c.name))
+            for c in self.__table__.columns
+        }
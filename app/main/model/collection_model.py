@@ -1,3 +1,5 @@
+import datetime
+
 import shapely
 from geoalchemy2 import Geometry
 from geoalchemy2.shape import to_shape
@@ -28,3 +30,22 @@ class Collection(db.Model):
         data["spatial_extent_wkt"] = shape.wkt
 
         return data
+
+
+class PublicCollection(Collection):
+    """
+    Collection harvested from a public catalog, kept locally so that collection searches can be answered by PostGIS
+    instead of querying every public catalog.
+    """
+    __tablename__ = "public_collections"
+    __table_args__ = (
+        db.Index("ix_public_collections_temporal_extent", "temporal_extent_start", "temporal_extent_end"),
+    )
+    parent_catalog_id: int = db.Column(db.Integer,
+                                       db.ForeignKey('public_catalogs.id', ondelete='CASCADE'),
+                                       nullable=False,
+                                       index=True)
+    stac_collection: str = db.Column(db.Text, nullable=False)
+    harvested_on: datetime.datetime = db.Column(db.DateTime,
+                                                nullable=False,
+                                                default=datetime.datetime.utcnow)
@@ -20,13 +20,18 @@ class PublicCatalog(db.Model):
 
 class StoredSearchParameters(db.Model):
     __tablename__ = "stored_search_parameters"
+    __table_args__ = (
+        db.Index("ix_stored_search_parameters_catalog_collection", "associated_catalog_id", "collection"),
+    )
     id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
     bbox = db.Column(db.Text, nullable=True, default="[]")
     datetime = db.Column(db.Text, nullable=True, default="")
     collection = db.Column(db.Text, nullable=True, default="")
     used_search_parameters: str = db.Column(db.Text,
-                                            nullable=False,
-                                            unique=True)
+                                            nullable=False)
+    used_search_parameters_hash: str = db.Column(db.String(64),
+                                                 nullable=True,
+                                                 unique=True)
     associated_catalog_id: int = db.Column(db.Integer,
                                            db.ForeignKey('public_catalogs.id',
                                                          ondelete='CASCADE'),
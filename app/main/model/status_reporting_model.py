@@ -5,6 +5,11 @@ from .. import db
 
 class StacIngestionStatus(db.Model):
     __tablename__ = "stac_ingestion_status"
+    __table_args__ = (
+        db.Index("ix_stac_ingestion_status_source_id", "source_stac_api_url", "id"),
+        db.Index("ix_stac_ingestion_status_time_started_id", "time_started", "id"),
+        db.Index("ix_stac_ingestion_status_time_finished_id", "time_finished", "id"),
+    )
     id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
     time_started: datetime.datetime = db.Column(
         db.DateTime, nullable=True, default=datetime.datetime.utcnow)
@@ -36,3 +41,31 @@ class StacIngestionStatus(db.Model):
             c.name: str(getattr(self, c.name))
             for c in self.__table__.columns
         }
+
+
+class StacIngestionStatusDailySummary(db.Model):
+    __tablename__ = "stac_ingestion_status_daily_summaries"
+    __table_args__ = (
+        db.UniqueConstraint("day", "source_stac_api_url", name="uq_stac_ingestion_status_daily_summaries_day_source"),
+        # statuses without a source catalog are rolled up into a single row per day
+        db.Index("uq_stac_ingestion_status_daily_summaries_day_unknown_source", "day", unique=True,
+                 postgresql_where=db.text("source_stac_api_url IS NULL")),
+    )
+    id: int = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    day: datetime.date = db.Column(db.Date, nullable=False)
+    source_stac_api_url: str = db.Column(db.Text, db.ForeignKey('public_catalogs.url', ondelete='CASCADE'),
+                                         nullable=True, index=True)
+    ingestions_count: int = db.Column(db.Integer, nullable=False, default=0)
+    updates_count: int = db.Column(db.Integer, nullable=False, default=0)
+    errored_count: int = db.Column(db.Integer, nullable=False, default=0)
+    newly_stored_collections_count: int = db.Column(db.Integer, nullable=False, default=0)
+    updated_collections_count: int = db.Column(db.Integer, nullable=False, default=0)
+    newly_stored_items_count: int = db.Column(db.Integer, nullable=False, default=0)
+    updated_items_count: int = db.Column(db.Integer, nullable=False, default=0)
+    already_stored_items_count: int = db.Column(db.Integer, nullable=False, default=0)
+
+    def as_dict(self):
+        return {
+            c.name: str(getattr(self, c.name))
+            for c in self.__table__.columns
+        }
@@ -1,12 +1,54 @@
-import requests
+import base64
+import functools
+import hashlib
 import json
 import logging
+import threading
+import time
+import redis
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from flask import current_app
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from ..custom_exceptions import *
+from ..util.fan_out import fan_out
+from ..util.http_client import get_http_session
+from ..util.redis_client import get_redis_client
 
+# access tokens keyed by tenant and client id, with the time they expire at
+_apim_auth_tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+_apim_auth_token_lock = threading.Lock()
 
-def get_apim_auth_token():
+
+def get_apim_auth_token() -> str:
+    """
+    Get an access token for the Azure management plane.
+
+    The token is cached and only exchanged for a new one APIM_TOKEN_REFRESH_MARGIN_SECONDS before it expires. A single
+    request refreshes it while concurrent ones wait for the new token.
+
+    Returns:
+        str: Access token of the APIM service principal.
+    """
+    tenant_id = current_app.config["APIM_CONFIG_APIM_TENANT_ID"]
+    client_id = current_app.config["APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_ID"]
+    refresh_margin = current_app.config["APIM_TOKEN_REFRESH_MARGIN_SECONDS"]
+    key = (tenant_id, client_id)
+    cached = _apim_auth_tokens.get(key)
+    if cached is not None and time.time() < cached[1] - refresh_margin:
+        return cached[0]
+    with _apim_auth_token_lock:
+        # another request refreshed the token while this one waited
+        cached = _apim_auth_tokens.get(key)
+        if cached is not None and time.time() < cached[1] - refresh_margin:
+            return cached[0]
+        access_token, expires_on = _fetch_apim_auth_token()
+        _apim_auth_tokens[key] = (access_token, expires_on)
+        return access_token
+
+
+def _fetch_apim_auth_token() -> Tuple[str, float]:
     tenant_id = current_app.config["APIM_CONFIG_APIM_TENANT_ID"]
     client_id = current_app.config["APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_ID"]
     client_secret = current_app.config["APIM_CONFIG_APIM_SERVICE_PRINCIPAL_CLIENT_SECRET"]
@@ -19,10 +61,15 @@ def get_apim_auth_token():
         'resource': "https://management.azure.com/"
     }
 
-    response = requests.post(url, headers=headers, data=body)
+    requested_at = time.time()
+    response = get_http_session().post(url, headers=headers, data=body)
     response.raise_for_status()  # raise exception if the request failed
     res_json = response.json()
-    return res_json["access_token"]
+    if "expires_on" in res_json:
+        expires_on = float(res_json["expires_on"])
+    else:
+        expires_on = requested_at + float(res_json.get("expires_in", 0))
+    return res_json["access_token"], expires_on
 
 
 def create_user_on_apim(user_id: str, email: str, first_name: str, last_name: str) -> Dict[str, Any]:
@@ -88,7 +135,7 @@ def create_user_on_apim(user_id: str, email: str, first_name: str, last_name: st
         }
     })
 
-    response = requests.put(url, headers=headers, data=body)
+    response = get_http_session().put(url, headers=headers, data=body)
 
     if response.status_code == 200:
         raise APIMUserAlreadyExistsError(
@@ -141,7 +188,7 @@ def get_user_from_apim(user_id: str) -> Dict[str, Any]:
         "Content-Type": "application/json",
     }
 
-    response = requests.get(url, headers=headers)
+    response = get_http_session().get(url, headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -175,7 +222,7 @@ def delete_user_from_apim(user_id: str) -> str:
         "Content-Type": "application/json",
     }
 
-    response = requests.delete(url, headers=headers)
+    response = get_http_session().delete(url, headers=headers)
 
     if response.status_code == 200:
         return user_id
@@ -252,7 +299,7 @@ def make_subscription_for_user_on_all_apis(user_id: str) -> Dict[str, Any]:
         }
     })
 
-    response = requests.put(url, headers=headers, data=body)
+    response = get_http_session().put(url, headers=headers, data=body)
 
     if response.status_code == 201:
         return response.json()
@@ -309,7 +356,7 @@ def get_subscription_for_user(user_id: str) -> Dict[str, Any]:
         "Content-Type": "application/json",
     }
 
-    response = requests.get(url, headers=headers)
+    response = get_http_session().get(url, headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -318,10 +365,82 @@ def get_subscription_for_user(user_id: str) -> Dict[str, Any]:
             f"Subscription for user with id {user_id} not found. Status code: {response.status_code}, Response: {response.text}")
 
 
+@functools.lru_cache(maxsize=None)
+def _get_secrets_cache_fernet(secret_key: str) -> Fernet:
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+               info=b"stac-portal apim subscription secrets").derive(secret_key.encode())
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _get_secrets_cache_key(user_id: str) -> str:
+    return "stac_portal:apim_secrets:" + hashlib.sha256(user_id.encode()).hexdigest()
+
+
+def _get_secrets_generation_key(user_id: str) -> str:
+    return "stac_portal:apim_secrets_generation:" + hashlib.sha256(user_id.encode()).hexdigest()
+
+
+# only cache secrets read before the last invalidation of the user if none happened since, so keys fetched just before
+# a regeneration never end up in the cache after it
+_CACHE_SECRETS_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+
+def _get_cached_subscription_secrets(user_id: str) -> Tuple[Dict[str, str] or None, str or None]:
+    fernet = _get_secrets_cache_fernet(current_app.config["SECRET_KEY"])
+    try:
+        cached, generation = get_redis_client().mget(_get_secrets_cache_key(user_id),
+                                                     _get_secrets_generation_key(user_id))
+        generation = generation.decode() if generation is not None else "0"
+        if cached is not None:
+            return json.loads(fernet.decrypt(cached)), generation
+        return None, generation
+    except (redis.exceptions.RedisError, InvalidToken) as e:
+        logging.warning(f"Could not read cached subscription secrets: {e}")
+    return None, None
+
+
+def _cache_subscription_secrets(user_id: str, secrets: Dict[str, str], generation: str) -> None:
+    fernet = _get_secrets_cache_fernet(current_app.config["SECRET_KEY"])
+    try:
+        get_redis_client().register_script(_CACHE_SECRETS_SCRIPT)(
+            keys=[_get_secrets_cache_key(user_id), _get_secrets_generation_key(user_id)],
+            args=[generation, fernet.encrypt(json.dumps(secrets).encode()),
+                  current_app.config["APIM_SECRETS_CACHE_TTL_SECONDS"]])
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not cache subscription secrets: {e}")
+
+
+def invalidate_subscription_secrets_cache(user_id: str) -> None:
+    """
+    Drops the cached subscription keys of a user, so the next lookup reads them from the API Management (APIM) service.
+
+    Lookups which were already in flight do not cache what they read either.
+
+    Args:
+        user_id (str): The unique identifier of the user whose cached subscription keys are to be dropped.
+    """
+    generation_key = _get_secrets_generation_key(user_id)
+    try:
+        pipeline = get_redis_client().pipeline()
+        pipeline.incr(generation_key)
+        # outlives every lookup in flight, a lost generation only stops secrets from being cached
+        pipeline.expire(generation_key, 86400)
+        pipeline.delete(_get_secrets_cache_key(user_id))
+        pipeline.execute()
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not invalidate cached subscription secrets: {e}")
+
+
 def get_subscription_secrets_for_user(user_id: str) -> Dict[str, str]:
     """
     Retrieves the primary and secondary keys for a user's subscription from the API Management (APIM) service.
 
+    The keys are cached in Redis, encrypted with a key derived from SECRET_KEY, for APIM_SECRETS_CACHE_TTL_SECONDS.
+
     Args:
         user_id (str): The unique identifier of the user for whom the subscription keys are to be retrieved.
 
@@ -336,6 +455,10 @@ def get_subscription_secrets_for_user(user_id: str) -> Dict[str, str]:
         }
     """
 
+    cached, generation = _get_cached_subscription_secrets(user_id)
+    if cached is not None:
+        return cached
+
     subscription_id = current_app.config["APIM_CONFIG_APIM_SUBSCRIPTION_ID"]
     rg_name = current_app.config["APIM_CONFIG_APIM_RESOURCE_GROUP_NAME"]
     apim_name = current_app.config["APIM_CONFIG_APIM_NAME"]
@@ -347,10 +470,13 @@ def get_subscription_secrets_for_user(user_id: str) -> Dict[str, str]:
         "Content-Type": "application/json",
     }
 
-    response = requests.post(url, headers=headers)
+    response = get_http_session().post(url, headers=headers)
 
     if response.status_code == 200:
-        return response.json()
+        secrets = response.json()
+        if generation is not None:
+            _cache_subscription_secrets(user_id, secrets, generation)
+        return secrets
     else:
         raise APIMSubscriptionNotFoundError(
             f"Subscription for user with id {user_id} not found. Status code: {response.status_code}, Response: {response.text}")
@@ -382,7 +508,8 @@ def delete_subscription_for_user(user_id: str) -> str:
         "Content-Type": "application/json",
     }
 
-    response = requests.delete(url, headers=headers)
+    response = get_http_session().delete(url, headers=headers)
+    invalidate_subscription_secrets_cache(user_id)
 
     if response.status_code == 200:
         return user_id
@@ -398,6 +525,8 @@ def regenerate_subscription_for_user(user_id: str) -> str:
     """
     Regenerates the subscription keys for a user in the API Management (APIM) service.
 
+    Both keys are regenerated concurrently, and the cached keys of the user are dropped.
+
     Args:
         user_id (str): The unique identifier of the user for whom the subscription keys are to be regenerated.
 
@@ -422,10 +551,15 @@ def regenerate_subscription_for_user(user_id: str) -> str:
         "Authorization": f"Bearer {get_apim_auth_token()}",
         "Content-Type": "application/json",
     }
-    responses = []
-    for url in urls:
-        response = requests.post(url, headers=headers)
-        responses.append(response)
+    session = get_http_session()
+    outcome = fan_out({url: (url, functools.partial(session.post, url, headers=headers)) for url in urls},
+                      max_concurrency=len(urls), max_per_host=len(urls))
+    # a key may have changed even when the other regeneration failed
+    invalidate_subscription_secrets_cache(user_id)
+    if outcome.errors:
+        raise APIMSubscriptionKeyRefreshError(
+            f"Failed to refresh subscription keys for user with id {user_id}. Errors: {list(outcome.errors.values())}")
+    responses = [outcome.results[url] for url in urls]
 
     if all(response.status_code == 204 for response in responses):
         return user_id
@@ -0,0 +1,136 @@
+import datetime
+import logging
+import time
+from typing import Any, Callable, Dict, List
+
+import gevent
+import redis
+from flask import current_app
+
+from ..custom_exceptions import *
+from ..model.public_catalogs_model import PublicCatalog
+from ..util.redis_client import get_redis_client
+
+_EWMA_ALPHA = 0.2
+
+# updates the statistics of a catalog in one step, so concurrent calls from every worker never overwrite each other
+_RECORD_CALL_SCRIPT = """
+local alpha = tonumber(ARGV[1])
+local requests = redis.call('HINCRBY', KEYS[1], 'requests', 1)
+local function ewma(field, value)
+    local previous = tonumber(redis.call('HGET', KEYS[1], field))
+    if requests == 1 or previous == nil then
+        return value
+    end
+    return alpha * value + (1 - alpha) * previous
+end
+redis.call('HSET', KEYS[1],
+    'latency_ms', string.format('%.17g', ewma('latency_ms', tonumber(ARGV[2]))),
+    'error_rate', string.format('%.17g', ewma('error_rate', tonumber(ARGV[3]))))
+local consecutive_failures = 0
+if ARGV[3] == '0' then
+    redis.call('HSET', KEYS[1], 'consecutive_failures', 0, 'circuit_open_until', 0, 'last_success', ARGV[4])
+else
+    consecutive_failures = redis.call('HINCRBY', KEYS[1], 'consecutive_failures', 1)
+    redis.call('HINCRBY', KEYS[1], 'failures', 1)
+    redis.call('HSET', KEYS[1], 'last_failure', ARGV[4], 'last_error', ARGV[7])
+    if consecutive_failures >= tonumber(ARGV[5]) then
+        redis.call('HSET', KEYS[1], 'circuit_open_until', string.format('%.17g', tonumber(ARGV[4]) + tonumber(ARGV[6])))
+    end
+end
+redis.call('DEL', KEYS[2])
+return consecutive_failures
+"""
+
+
+def _health_key(public_catalog_url: str) -> str:
+    return f"stac_portal:catalog_health:{public_catalog_url}"
+
+
+def call_public_catalog(public_catalog_url: str, call: Callable[[], Any]) -> Any:
+    """
+    Make a call to a public catalog through its circuit breaker, recording its latency and outcome.
+
+    :param public_catalog_url: Url of the public catalog the call talks to
+    :param call: The call to make
+    :return: Result of the call
+    :raises PublicCatalogCircuitOpenError: If the catalog failed too often recently and the call was not made
+    """
+    if not _is_call_allowed(public_catalog_url):
+        raise PublicCatalogCircuitOpenError(f"Circuit for {public_catalog_url} is open")
+    started = time.monotonic()
+    try:
+        result = call()
+    except (Exception, gevent.GreenletExit) as e:
+        _record_call(public_catalog_url, time.monotonic() - started, error=e)
+        raise
+    _record_call(public_catalog_url, time.monotonic() - started)
+    return result
+
+
+def _is_call_allowed(public_catalog_url: str) -> bool:
+    try:
+        client = get_redis_client()
+        circuit_open_until = client.hget(_health_key(public_catalog_url), "circuit_open_until")
+        if circuit_open_until is None or float(circuit_open_until) == 0:
+            return True
+        if time.time() < float(circuit_open_until):
+            return False
+        # half open, let a single probe through
+        return bool(client.set(_health_key(public_catalog_url) + ":probe", 1, nx=True,
+                               ex=current_app.config["PUBLIC_CATALOG_CIRCUIT_OPEN_SECONDS"]))
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Catalog health unavailable, allowing call to {public_catalog_url}: {e}")
+        return True
+
+
+def _record_call(public_catalog_url: str, latency: float, error: BaseException = None) -> None:
+    key = _health_key(public_catalog_url)
+    try:
+        consecutive_failures = get_redis_client().register_script(_RECORD_CALL_SCRIPT)(
+            keys=[key, key + ":probe"],
+            args=[_EWMA_ALPHA, latency * 1000, 0 if error is None else 1, time.time(),
+                  current_app.config["PUBLIC_CATALOG_CIRCUIT_FAILURE_THRESHOLD"],
+                  current_app.config["PUBLIC_CATALOG_CIRCUIT_OPEN_SECONDS"],
+                  "" if error is None else repr(error)[:500]])
+        if consecutive_failures >= current_app.config["PUBLIC_CATALOG_CIRCUIT_FAILURE_THRESHOLD"]:
+            logging.info(f"Opening circuit for {public_catalog_url} after {consecutive_failures} failures")
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Catalog health unavailable, could not record call to {public_catalog_url}: {e}")
+
+
+def _format_timestamp(timestamp: str or None) -> str or None:
+    if not timestamp:
+        return None
+    return datetime.datetime.utcfromtimestamp(float(timestamp)).strftime("%m/%d/%Y, %H:%M:%S")
+
+
+def get_public_catalogs_health() -> List[Dict[str, Any]]:
+    """
+    Get the health statistics of every stored public catalog.
+
+    :return: Health statistics as a list of dictionaries
+    """
+    public_catalogs: [PublicCatalog] = PublicCatalog.query.order_by(PublicCatalog.id).all()
+    pipeline = get_redis_client().pipeline()
+    for public_catalog in public_catalogs:
+        pipeline.hgetall(_health_key(public_catalog.url))
+    now = time.time()
+    data = []
+    for public_catalog, health in zip(public_catalogs, pipeline.execute()):
+        health = {k.decode(): v.decode() for k, v in health.items()}
+        data.append({
+            "id": public_catalog.id,
+            "name": public_catalog.name,
+            "url": public_catalog.url,
+            "requests": int(health.get("requests", 0)),
+            "failures": int(health.get("failures", 0)),
+            "consecutive_failures": int(health.get("consecutive_failures", 0)),
+            "error_rate": float(health.get("error_rate", 0)),
+            "latency_ms": float(health["latency_ms"]) if "latency_ms" in health else None,
+            "last_success": _format_timestamp(health.get("last_success")),
+            "last_failure": _format_timestamp(health.get("last_failure")),
+            "last_error": health.get("last_error"),
+            "circuit_open": float(health.get("circuit_open_until", 0)) > now,
+        })
+    return data
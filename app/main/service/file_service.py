@@ -1,63 +1,129 @@
+import functools
+from collections import namedtuple
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+from urllib.parse import quote, unquote, urlsplit
 
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions
+from azure.storage.blob import generate_blob_sas, generate_container_sas, BlobSasPermissions, \
+    ContainerSasPermissions
 from flask import current_app
 
+SAS_PERMISSION_READ = "read"
+SAS_PERMISSION_WRITE = "write"
+SAS_PERMISSIONS = (SAS_PERMISSION_READ, SAS_PERMISSION_WRITE)
 
-def get_write_sas_token(filename: str):
-    connection_string = current_app.config["AZURE_STORAGE_CONNECTION_STRING"]
-    account_key = connection_string.split("AccountKey=")[1].split(";")[0]
-    connection_string_split = connection_string.split(";")
+StorageCredentials = namedtuple("StorageCredentials", ["account_name", "account_key", "endpoint_suffix"])
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_storage_connection_string(connection_string: str) -> StorageCredentials:
     azure_params = {}
-    for param in connection_string_split:
-        param_split = param.split("=")
-        azure_params[param_split[0]] = param_split[1]
-    azure_params["AccountKey"] = account_key
-    account_name = azure_params["AccountName"]
-    account_key = azure_params["AccountKey"]
-    endpoint_suffix = azure_params["EndpointSuffix"]
-    container_name = current_app.config["AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS"]
-    blob_name = filename
+    for param in connection_string.split(";"):
+        if param:
+            # the account key is base64 and may end in "=" itself
+            name, value = param.split("=", 1)
+            azure_params[name] = value
+    return StorageCredentials(account_name=azure_params["AccountName"],
+                              account_key=azure_params["AccountKey"],
+                              endpoint_suffix=azure_params.get("EndpointSuffix", "core.windows.net"))
+
+
+def get_storage_credentials() -> StorageCredentials:
+    """
+    Get the storage account credentials, parsed once from AZURE_STORAGE_CONNECTION_STRING.
+
+    :return: Account name, account key and endpoint suffix of the storage account
+    """
+    return _parse_storage_connection_string(current_app.config["AZURE_STORAGE_CONNECTION_STRING"])
+
 
+def _blob_sas_permission(permission: str) -> BlobSasPermissions:
+    if permission == SAS_PERMISSION_WRITE:
+        return BlobSasPermissions(write=True)
+    if permission == SAS_PERMISSION_READ:
+        return BlobSasPermissions(read=True)
+    raise ValueError(f"Permission must be one of {', '.join(SAS_PERMISSIONS)}")
+
+
+def _get_blob_sas_token(filename: str, permission: str, expiry: datetime = None) -> Tuple[str, str, str]:
+    credentials = get_storage_credentials()
+    container_name = current_app.config["AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS"]
     sas_token = generate_blob_sas(
-        account_name=account_name,
-        account_key=account_key,
+        account_name=credentials.account_name,
+        account_key=credentials.account_key,
         container_name=container_name,
-        blob_name=blob_name,
-        permission=BlobSasPermissions(write=True),
-        expiry=datetime.utcnow() + timedelta(hours=1),
+        blob_name=filename,
+        permission=_blob_sas_permission(permission),
+        expiry=expiry or datetime.utcnow() + timedelta(hours=1),
     )
 
-    blob_url = f"https://{account_name}.blob.{endpoint_suffix}/{container_name}/{blob_name}?{sas_token}"
-    blob_url_without_sas_token = f"https://{account_name}.blob.{endpoint_suffix}/{container_name}/{blob_name}"
-    return sas_token, blob_url, blob_url_without_sas_token
+    blob_url_without_sas_token = \
+        f"https://{credentials.account_name}.blob.{credentials.endpoint_suffix}/{container_name}/{quote(filename)}"
+    return sas_token, f"{blob_url_without_sas_token}?{sas_token}", blob_url_without_sas_token
 
 
-def get_read_sas_token(filename: str):
-    # if filename begins with http, it is url, only take the filename
+def _strip_blob_url(filename: str) -> str:
+    # if filename begins with http, it is url, only take the filename. Endpoints quote the blob name and may carry a
+    # SAS token, so drop the query and unquote to get the name back.
     if filename.startswith("http"):
-        filename = filename.split("/")[-1]
+        filename = unquote(urlsplit(filename).path.split("/")[-1])
+    return filename
 
-    connection_string = current_app.config["AZURE_STORAGE_CONNECTION_STRING"]
-    account_key = connection_string.split("AccountKey=")[1].split(";")[0]
-    connection_string_split = connection_string.split(";")
-    azure_params = {}
-    for param in connection_string_split:
-        param_split = param.split("=")
-        azure_params[param_split[0]] = param_split[1]
-    azure_params["AccountKey"] = account_key
-    account_name = azure_params["AccountName"]
-    account_key = azure_params["AccountKey"]
-    endpoint_suffix = azure_params["EndpointSuffix"]
+
+def get_write_sas_token(filename: str):
+    return _get_blob_sas_token(filename, SAS_PERMISSION_WRITE)
+
+
+def get_read_sas_token(filename: str):
+    return _get_blob_sas_token(_strip_blob_url(filename), SAS_PERMISSION_READ)
+
+
+def get_sas_tokens(filenames: List[str], permission: str) -> List[Dict[str, Any]]:
+    """
+    Sign SAS tokens for a list of blobs in one go.
+
+    :param filenames: Names of the blobs, or their urls for read tokens
+    :param permission: One of SAS_PERMISSIONS
+    :return: Filename, SAS token, endpoint with and without the token of each blob, in the given order
+    """
+    expiry = datetime.utcnow() + timedelta(hours=1)
+    data = []
+    for filename in filenames:
+        if permission == SAS_PERMISSION_READ:
+            filename = _strip_blob_url(filename)
+        sas_token, endpoint, endpoint_without_sas_token = _get_blob_sas_token(filename, permission, expiry)
+        data.append({"filename": filename,
+                     "sas_token": sas_token,
+                     "endpoint": endpoint,
+                     "endpoint_without_sas_token": endpoint_without_sas_token})
+    return data
+
+
+def get_container_sas_token(permission: str) -> Tuple[str, str, str]:
+    """
+    Sign a SAS token for the whole STAC items container.
+
+    The token grants access to every blob in the container for an hour, use per-blob tokens where possible.
+
+    :param permission: One of SAS_PERMISSIONS, reading also allows listing and writing also allows creating blobs
+    :return: SAS token, container endpoint with and without the token
+    """
+    if permission == SAS_PERMISSION_WRITE:
+        container_permission = ContainerSasPermissions(write=True, create=True)
+    elif permission == SAS_PERMISSION_READ:
+        container_permission = ContainerSasPermissions(read=True, list=True)
+    else:
+        raise ValueError(f"Permission must be one of {', '.join(SAS_PERMISSIONS)}")
+    credentials = get_storage_credentials()
     container_name = current_app.config["AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS"]
-    # create read sas token
-    sas_token = generate_blob_sas(
-        account_name=account_name,
-        account_key=account_key,
+    sas_token = generate_container_sas(
+        account_name=credentials.account_name,
+        account_key=credentials.account_key,
         container_name=container_name,
-        blob_name=filename,
-        permission=BlobSasPermissions(read=True),
+        permission=container_permission,
         expiry=datetime.utcnow() + timedelta(hours=1),
     )
 
-    return sas_token, f"https://{account_name}.blob.{endpoint_suffix}/{container_name}/{filename}?{sas_token}", f"https://{account_name}.blob.{endpoint_suffix}/{container_name}/{filename}"
+    endpoint_without_sas_token = \
+        f"https://{credentials.account_name}.blob.{credentials.endpoint_suffix}/{container_name}"
+    return sas_token, f"{endpoint_without_sas_token}?{sas_token}", endpoint_without_sas_token
@@ -0,0 +1,225 @@
+import json
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+import gevent
+import redis
+from flask import current_app
+from flask.app import Flask
+
+from ..util.redis_client import get_redis_client
+
+INGESTION_PRIORITY_INTERACTIVE = "interactive"
+INGESTION_PRIORITY_SCHEDULED = "scheduled"
+# dispatched in this order, a class only gets capacity left over by the classes before it
+INGESTION_PRIORITIES = (INGESTION_PRIORITY_INTERACTIVE, INGESTION_PRIORITY_SCHEDULED)
+
+_INGESTER_INPUT_KEY = "stac_selective_ingester_input_list"
+_KEY_PREFIX = "stac_portal:ingestion_queue:"
+_EWMA_ALPHA = 0.2
+
+# Jobs of a class wait in one list per source catalog. The catalogs with waiting jobs of a class are kept in a ring,
+# which the dispatcher rotates so every catalog gets its turn regardless of how many jobs it has waiting.
+# Every key the scripts touch is passed in KEYS. The staged jobs can not share a hash slot with the ingester input list,
+# whose name is fixed by the ingester, so the dispatcher needs a standalone Redis rather than Redis Cluster.
+#
+# KEYS: ring, ring members, then the job list of each job. ARGV: catalog and payload of each job.
+_ENQUEUE_SCRIPT = """
+for i = 1, #ARGV / 2 do
+    local catalog = ARGV[2 * i - 1]
+    redis.call('RPUSH', KEYS[2 + i], ARGV[2 * i])
+    if redis.call('SADD', KEYS[2], catalog) == 1 then
+        redis.call('RPUSH', KEYS[1], catalog)
+    end
+end
+"""
+
+# KEYS: ingester input list, ring and ring members of each class, then the job lists of the catalogs in the rings.
+# ARGV: maximum queued jobs, number of classes, the classes, then class and catalog of each job list. Catalogs which
+# joined a ring after its job lists were read are skipped until the next dispatch.
+_DISPATCH_SCRIPT = """
+local free = tonumber(ARGV[1]) - redis.call('LLEN', KEYS[1])
+local classes = tonumber(ARGV[2])
+local job_lists = {}
+for c = 1, classes do
+    job_lists[ARGV[2 + c]] = {}
+end
+local first_job_list = 2 + 2 * classes
+for i = first_job_list, #KEYS do
+    local arg = 2 + classes + 2 * (i - first_job_list)
+    job_lists[ARGV[arg + 1]][ARGV[arg + 2]] = KEYS[i]
+end
+local dispatched = {}
+for c = 1, classes do
+    local priority = ARGV[2 + c]
+    local ring = KEYS[2 * c]
+    local members = KEYS[2 * c + 1]
+    local skipped = 0
+    while free > 0 and skipped < redis.call('LLEN', ring) do
+        local catalog = redis.call('LPOP', ring)
+        redis.call('RPUSH', ring, catalog)
+        local job_list = job_lists[priority][catalog]
+        if job_list == nil then
+            skipped = skipped + 1
+        else
+            local job = redis.call('LPOP', job_list)
+            if job then
+                local decoded = cjson.decode(job)
+                redis.call('RPUSH', KEYS[1], decoded['payload'])
+                table.insert(dispatched, priority)
+                table.insert(dispatched, tostring(decoded['enqueued_at']))
+                free = free - 1
+            else
+                redis.call('LREM', ring, -1, catalog)
+                redis.call('SREM', members, catalog)
+            end
+        end
+    end
+end
+return dispatched
+"""
+
+# KEYS: statistics of a class. ARGV: EWMA alpha, dispatch time, then the wait in milliseconds of each dispatched job.
+_RECORD_WAITS_SCRIPT = """
+local alpha = tonumber(ARGV[1])
+local wait_ms = tonumber(redis.call('HGET', KEYS[1], 'wait_ms'))
+local last_wait_ms
+for i = 3, #ARGV do
+    last_wait_ms = tonumber(ARGV[i])
+    if wait_ms == nil then
+        wait_ms = last_wait_ms
+    else
+        wait_ms = alpha * last_wait_ms + (1 - alpha) * wait_ms
+    end
+end
+redis.call('HINCRBY', KEYS[1], 'dispatched', #ARGV - 2)
+redis.call('HSET', KEYS[1],
+    'wait_ms', string.format('%.17g', wait_ms),
+    'last_wait_ms', string.format('%.17g', last_wait_ms),
+    'last_dispatch', ARGV[2])
+"""
+
+
+def _ring_key(priority: str) -> str:
+    return _KEY_PREFIX + "catalogs:" + priority
+
+
+def _job_list_key(priority: str, source_stac_catalog_url: str) -> str:
+    return _KEY_PREFIX + "jobs:" + priority + ":" + source_stac_catalog_url
+
+
+def enqueue_ingestion_jobs(jobs: List[Tuple[str, str]], priority: str = INGESTION_PRIORITY_INTERACTIVE) -> None:
+    """
+    Stage ingestion jobs for the dispatcher and dispatch as many as the ingester can take right away.
+
+    :param jobs: Source STAC catalog url and payload of each job
+    :param priority: Priority class of the jobs, one of INGESTION_PRIORITIES
+    """
+    if priority not in INGESTION_PRIORITIES:
+        raise ValueError(f"Priority must be one of {', '.join(INGESTION_PRIORITIES)}")
+    if not jobs:
+        return
+    enqueued_at = time.time()
+    keys = [_ring_key(priority), _ring_key(priority) + ":members"]
+    args = []
+    for source_stac_catalog_url, payload in jobs:
+        keys.append(_job_list_key(priority, source_stac_catalog_url))
+        args.extend([source_stac_catalog_url, json.dumps({"payload": payload, "enqueued_at": enqueued_at})])
+    client = get_redis_client()
+    client.register_script(_ENQUEUE_SCRIPT)(keys=keys, args=args)
+    dispatch_ingestion_jobs()
+
+
+def dispatch_ingestion_jobs() -> int:
+    """
+    Move staged jobs to the ingester input list until it holds INGESTION_DISPATCH_MAX_QUEUED jobs.
+
+    Interactive jobs go before scheduled ones, and within a class the catalogs take turns. The whole dispatch runs as a
+    single script in Redis, so dispatchers on every worker can run concurrently.
+
+    :return: Number of dispatched jobs
+    """
+    client = get_redis_client()
+    pipeline = client.pipeline(transaction=False)
+    for priority in INGESTION_PRIORITIES:
+        pipeline.lrange(_ring_key(priority), 0, -1)
+    keys = [_INGESTER_INPUT_KEY]
+    args = [current_app.config["INGESTION_DISPATCH_MAX_QUEUED"], len(INGESTION_PRIORITIES), *INGESTION_PRIORITIES]
+    job_list_keys = []
+    for priority, catalogs in zip(INGESTION_PRIORITIES, pipeline.execute()):
+        keys.extend([_ring_key(priority), _ring_key(priority) + ":members"])
+        for catalog in catalogs:
+            job_list_keys.append(_job_list_key(priority, catalog.decode()))
+            args.extend([priority, catalog.decode()])
+    dispatched = client.register_script(_DISPATCH_SCRIPT)(keys=keys + job_list_keys, args=args)
+    if not dispatched:
+        return 0
+    _record_wait_times(client, [(priority.decode(), float(enqueued_at))
+                                for priority, enqueued_at in zip(dispatched[::2], dispatched[1::2])])
+    return len(dispatched) // 2
+
+
+def _record_wait_times(client: redis.Redis, waits: List[Tuple[str, float]]) -> None:
+    now = time.time()
+    try:
+        record_waits = client.register_script(_RECORD_WAITS_SCRIPT)
+        for priority in {priority for priority, _ in waits}:
+            record_waits(keys=[_KEY_PREFIX + "stats:" + priority],
+                         args=[_EWMA_ALPHA, now, *[(now - enqueued_at) * 1000 for p, enqueued_at in waits
+                                                   if p == priority]])
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not record ingestion queue wait times: {e}")
+
+
+def get_ingestion_queue_stats() -> Dict[str, Any]:
+    """
+    Get the depth and wait times of the ingestion queue of each priority class.
+
+    :return: Jobs queued in the ingester input list, and per class the staged jobs, the catalogs they belong to, the
+        age of the oldest staged job and the average wait of dispatched jobs
+    """
+    client = get_redis_client()
+    now = time.time()
+    data = {"ingester_queued": client.llen(_INGESTER_INPUT_KEY), "classes": {}}
+    for priority in INGESTION_PRIORITIES:
+        catalogs = [i.decode() for i in client.lrange(_ring_key(priority), 0, -1)]
+        pipeline = client.pipeline(transaction=False)
+        for catalog in catalogs:
+            pipeline.llen(_job_list_key(priority, catalog))
+            pipeline.lindex(_job_list_key(priority, catalog), 0)
+        pipeline.hgetall(_KEY_PREFIX + "stats:" + priority)
+        outcome = pipeline.execute()
+        stats = {k.decode(): v.decode() for k, v in outcome[-1].items()}
+        depths = outcome[:-1:2]
+        heads = [json.loads(i) for i in outcome[1:-1:2] if i is not None]
+        data["classes"][priority] = {
+            "queued": sum(depths),
+            "queued_by_catalog": {catalog: depth for catalog, depth in zip(catalogs, depths) if depth},
+            "oldest_wait_ms": (now - min(i["enqueued_at"] for i in heads)) * 1000 if heads else None,
+            "dispatched": int(stats.get("dispatched", 0)),
+            "wait_ms": float(stats["wait_ms"]) if "wait_ms" in stats else None,
+            "last_wait_ms": float(stats["last_wait_ms"]) if "last_wait_ms" in stats else None,
+        }
+    return data
+
+
+def start_ingestion_dispatcher(app: Flask) -> gevent.Greenlet:
+    """
+    Start a greenlet which keeps topping up the ingester input list from the staged jobs as the ingester drains it.
+
+    :param app: Flask app providing the context for the dispatcher
+    :return: The dispatcher greenlet
+    """
+    interval = app.config["INGESTION_DISPATCH_INTERVAL_SECONDS"]
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    dispatch_ingestion_jobs()
+                except Exception as e:
+                    logging.error(f"Dispatching ingestion jobs failed: {e}")
+            gevent.sleep(interval)
+
+    return gevent.spawn(run)
@@ -1,34 +1,90 @@
+import datetime
 import functools
+import hashlib
 import json
 import logging
-import multiprocessing
-import urllib
-from threading import Thread
-from typing import Dict, List
-from urllib.parse import urljoin
-from gevent.threadpool import ThreadPool
-
-import gevent
-import redis
-import requests
+import threading
+from collections import defaultdict, namedtuple
+from typing import Dict, List, Optional
+
 import shapely
 import sqlalchemy
+from cachetools import TTLCache
 from flask import current_app
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import load_only
 
 from shapely.geometry import box, shape
-from stac_collection_search import search_collections_verbose as search_collections_on_stac_api
 
-from .status_reporting_service import make_stac_ingestion_status_entry
+from . import catalog_health_service
+from . import ingestion_scheduler_service
+from . import public_collections_service
+from .status_reporting_service import get_ingestion_job_hash, make_coalesced_stac_ingestion_status_entries, \
+    release_in_flight_ingestions
 from .. import db
 from ..custom_exceptions import *
+from ..model.catalog_sync_model import CatalogSyncJob, CatalogSyncResult
 from ..model.public_catalogs_model import PublicCatalog
 from ..model.public_catalogs_model import StoredSearchParameters
 from ..util import process_timestamp
+from ..util.fan_out import fan_out
+from ..util.http_client import get_http_session
 
 
 
 logging.basicConfig(level=logging.DEBUG)
 
+_SYNC_CHUNK_FACTOR = 4
+_PUBLIC_CATALOG_FIELDS = ("id", "name", "url", "description", "added_on")
+
+PublicCatalogRef = namedtuple("PublicCatalogRef", ["id", "name", "url"])
+_public_catalogs_by_id_cache: TTLCache = None
+_public_catalogs_by_id_lock = threading.Lock()
+
+
+def _get_public_catalogs_by_id(refresh: bool = False) -> Dict[int, PublicCatalogRef]:
+    """
+    Get the id, name and url of every stored public catalog keyed by id.
+
+    The map is loaded with a single query and kept for a few seconds, so one request never looks catalogs up row by
+    row and bursts of requests share one load.
+
+    :param refresh: Reload the map even if a cached one is available
+    :return: Mapping of public catalog id to its id, name and url
+    """
+    global _public_catalogs_by_id_cache
+    with _public_catalogs_by_id_lock:
+        if _public_catalogs_by_id_cache is None:
+            _public_catalogs_by_id_cache = TTLCache(
+                maxsize=1, ttl=current_app.config["PUBLIC_CATALOG_LOOKUP_CACHE_TTL_SECONDS"])
+        public_catalogs_by_id = None if refresh else _public_catalogs_by_id_cache.get("public_catalogs")
+    if public_catalogs_by_id is None:
+        rows = db.session.query(PublicCatalog.id, PublicCatalog.name, PublicCatalog.url).all()
+        public_catalogs_by_id = {row.id: PublicCatalogRef(row.id, row.name, row.url) for row in rows}
+        with _public_catalogs_by_id_lock:
+            _public_catalogs_by_id_cache["public_catalogs"] = public_catalogs_by_id
+    return public_catalogs_by_id
+
+
+def _get_public_catalog_ref(public_catalog_id: int) -> PublicCatalogRef:
+    """
+    Get the id, name and url of a public catalog from the id map, reloading it once if the catalog is not in it.
+
+    :raises PublicCatalogDoesNotExistError: If no catalog with this id is stored
+    """
+    public_catalog = _get_public_catalogs_by_id().get(public_catalog_id)
+    if public_catalog is None:
+        public_catalog = _get_public_catalogs_by_id(refresh=True).get(public_catalog_id)
+    if public_catalog is None:
+        raise PublicCatalogDoesNotExistError
+    return public_catalog
+
+
+def _invalidate_public_catalogs_by_id() -> None:
+    with _public_catalogs_by_id_lock:
+        if _public_catalogs_by_id_cache is not None:
+            _public_catalogs_by_id_cache.clear()
+
 
 def store_new_public_catalog(name: str, url: str, description: str) -> PublicCatalog:
     """
@@ -46,6 +102,8 @@ def store_new_public_catalog(name: str, url: str, description: str) -> PublicCat
         a.description = description
         db.session.add(a)
         db.session.commit()
+        _invalidate_public_catalogs_by_id()
+        public_collections_service.start_public_catalogs_harvest([a.id])
         return a
     except sqlalchemy.exc.IntegrityError:
         # rollback the session
@@ -53,35 +111,140 @@ def store_new_public_catalog(name: str, url: str, description: str) -> PublicCat
         raise CatalogAlreadyExistsError
 
 
-def store_publicly_available_catalogs() -> None:
+def store_publicly_available_catalogs() -> int:
+    """
+    Start a sync job storing all publicly available and valid catalogs from stac index in the database.
+
+    :return: Id of the sync job for which progress can be obtained
     """
-    Get all publicly available catalogs and store them in the database.
+    sync_job = CatalogSyncJob()
+    db.session.add(sync_job)
+    db.session.commit()
+    # a plain thread also runs under the unpatched development server, pywsgi.py turns it into a greenlet
+    threading.Thread(target=_run_public_catalogs_sync, args=(current_app._get_current_object(), sync_job.id),
+                     daemon=True).start()
+    return sync_job.id
+
+
+def get_public_catalogs_sync_job(sync_job_id: int) -> Dict[any, any]:
     """
-    lookup_api: str = "https://stacindex.org/api/catalogs"
-    logging.info(f"Looking up stac index on {lookup_api}")
-    response = requests.get(lookup_api)
-    response_result = response.json()
-    filtered_response_result = [i for i in response_result if i['isPrivate'] == False and i['isApi'] == True]
-    logging.info(f"Found {len(filtered_response_result)} public catalogs.")
+    Get the progress of a sync job and the outcome of every catalog it processed.
 
-    def run_async(title, catalog_url, catalog_summary, app_for_context):
-        with app_for_context.app_context():
-            try:
-                if not _is_catalog_public_and_valid(catalog_url):
-                    raise PublicCatalogNotPublicOrValidError
+    :param sync_job_id: Id of the sync job
+    :return: Sync job as a dictionary
+    """
+    sync_job: CatalogSyncJob = CatalogSyncJob.query.filter_by(id=sync_job_id).first()
+    if sync_job is None:
+        raise CatalogSyncJobDoesNotExistError
+    data = sync_job.as_dict()
+    data["results"] = [i.as_dict() for i in sync_job.results.order_by(CatalogSyncResult.id)]
+    return data
+
+
+def _run_public_catalogs_sync(app, sync_job_id: int) -> None:
+    with app.app_context():
+        sync_job: CatalogSyncJob = CatalogSyncJob.query.get(sync_job_id)
+        try:
+            lookup_api: str = "https://stacindex.org/api/catalogs"
+            logging.info(f"Looking up stac index on {lookup_api}")
+            response = get_http_session().get(lookup_api)
+            response.raise_for_status()
+            candidates = {}
+            for i in response.json():
+                if i['isPrivate'] == False and i['isApi'] == True:
+                    candidates.setdefault(i['url'], i)
+            logging.info(f"Found {len(candidates)} public catalogs.")
+
+            revalidate_after = datetime.timedelta(hours=app.config["PUBLIC_CATALOGS_SYNC_REVALIDATE_AFTER_HOURS"])
+            recently_validated = {url for url, in db.session.query(CatalogSyncResult.url).filter(
+                CatalogSyncResult.validated_on >= datetime.datetime.utcnow() - revalidate_after).distinct()}
+            skipped = [i for url, i in candidates.items() if url in recently_validated]
+            to_validate = [i for url, i in candidates.items() if url not in recently_validated]
+
+            sync_job.total_count = len(candidates)
+            _store_sync_results(sync_job, [(i, "skipped", "Validated recently", None) for i in skipped])
+
+            concurrency = app.config["PUBLIC_CATALOGS_SYNC_CONCURRENCY"]
+            timeout = app.config["PUBLIC_CATALOGS_SYNC_TIMEOUT_SECONDS"]
+            chunk_size = concurrency * _SYNC_CHUNK_FACTOR
+            stored_ids = []
+            for start in range(0, len(to_validate), chunk_size):
+                stored_ids.extend(
+                    _sync_public_catalogs_chunk(sync_job, to_validate[start:start + chunk_size], concurrency, timeout))
+            # make the new catalogs searchable right away instead of after the next periodic harvest
+            if stored_ids:
                 try:
-                    new_catalog: PublicCatalog = store_new_public_catalog(title, catalog_url, catalog_summary)
-                    logging.info(f"Storing catalog {title} with id {new_catalog.id}")
-                except CatalogAlreadyExistsError:
-                    logging.info(f"Catalog {title} already exists.")
-                    raise CatalogAlreadyExistsError
-            except:
-                logging.error(f"Error storing catalog {title}.")
+                    public_collections_service.harvest_public_catalogs(
+                        PublicCatalog.query.filter(PublicCatalog.id.in_(stored_ids)).all())
+                except Exception as e:
+                    logging.error(f"Harvesting catalogs stored by public catalogs sync {sync_job_id} failed: {e}")
 
-    app = current_app._get_current_object()  # TODO: Is there a better way to do this?
-    for catalog in filtered_response_result:
-        t = Thread(target=run_async, args=(catalog['title'], catalog['url'], catalog['summary'], app))
-        t.start()
+            sync_job.status = "finished"
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Public catalogs sync {sync_job_id} failed: {e}")
+            sync_job.status = "failed"
+            sync_job.error_message = str(e)
+        finally:
+            sync_job.time_finished = datetime.datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+
+
+def _sync_public_catalogs_chunk(sync_job: CatalogSyncJob, catalogs: List[Dict[any, any]], concurrency: int,
+                                timeout: float) -> List[int]:
+    """
+    Validate a chunk of stac index catalogs concurrently, then store the valid ones and the outcomes in one
+    transaction.
+
+    :return: Ids of the newly stored catalogs
+    """
+    outcome = fan_out({i['url']: (i['url'], functools.partial(_is_catalog_public_and_valid, i['url'], timeout))
+                       for i in catalogs},
+                      max_concurrency=concurrency,
+                      max_per_host=current_app.config["FAN_OUT_MAX_PER_HOST"],
+                      # every catalog makes two requests and waits for a free slot at most chunk factor times
+                      deadline=2 * timeout * (_SYNC_CHUNK_FACTOR + 1))
+    validated_on = datetime.datetime.utcnow()
+    valid = [i for i in catalogs if outcome.results.get(i['url'])]
+
+    stored = {}
+    if valid:
+        statement = postgresql.insert(PublicCatalog.__table__).values(
+            [{"name": i['title'], "url": i['url'], "description": i['summary'], "added_on": validated_on}
+             for i in valid]
+        ).on_conflict_do_nothing(index_elements=["url"]).returning(PublicCatalog.url, PublicCatalog.id)
+        stored = {url: id for url, id in db.session.execute(statement)}
+
+    results = []
+    for i in catalogs:
+        url = i['url']
+        if url in stored:
+            results.append((i, "stored", "", validated_on))
+        elif outcome.results.get(url):
+            results.append((i, "already_stored", "", validated_on))
+        elif url in outcome.results:
+            results.append((i, "invalid", "Catalog is not public or has no collections with items", validated_on))
+        elif url in outcome.errors:
+            results.append((i, "failed", str(outcome.errors[url]), None))
+        else:
+            results.append((i, "failed", "Validation timed out", None))
+    _store_sync_results(sync_job, results)
+    return list(stored.values())
+
+
+def _store_sync_results(sync_job: CatalogSyncJob, results: List[tuple]) -> None:
+    db.session.bulk_insert_mappings(CatalogSyncResult, [
+        {"job_id": sync_job.id, "url": catalog['url'], "title": catalog['title'], "outcome": outcome,
+         "message": message, "validated_on": validated_on}
+        for catalog, outcome, message, validated_on in results
+    ])
+    for _, outcome, _, _ in results:
+        counter = f"{outcome}_count"
+        setattr(sync_job, counter, getattr(sync_job, counter) + 1)
+    sync_job.processed_count += len(results)
+    db.session.commit()
+    _invalidate_public_catalogs_by_id()
 
 
 def remove_all_public_catalogs() -> None:
@@ -90,23 +253,26 @@ def remove_all_public_catalogs() -> None:
     """
     db.session.query(PublicCatalog).delete()
     db.session.commit()
+    _invalidate_public_catalogs_by_id()
 
 
-def _is_catalog_public_and_valid(url: str) -> bool:
+def _is_catalog_public_and_valid(url: str, timeout: float = None) -> bool:
     """
     Check if a catalog is public and valid.
 
     For the catalog to be valid it must have at least one collection with at least one item.
     :param url: Url of the catalog
+    :param timeout: Timeout of each request to the catalog, None for the default timeout
     :return: True if the catalog is public and valid, False otherwise
     """
+    timeout_kwargs = {"timeout": timeout} if timeout is not None else {}
     url_removed_slash = url[:-1] if url.endswith('/') else url
-    response = requests.get(url_removed_slash + '/collections')
+    response = get_http_session().get(url_removed_slash + '/collections', **timeout_kwargs)
     if response.status_code != 200:
         return False
     if len(response.json()['collections']) == 0:
         return False
-    response_2 = requests.get(url_removed_slash + '/search?limit=1')
+    response_2 = get_http_session().get(url_removed_slash + '/search?limit=1', **timeout_kwargs)
     if response_2.status_code != 200:
         return False
     if len(response_2.json()['features']) != 1:
@@ -114,39 +280,19 @@ def _is_catalog_public_and_valid(url: str) -> bool:
     return True
 
 
-# @cached(TTLCache(maxsize=1000, ttl=3600))  # does not cache when the threading is used
-def get_collections_for_public_catalog(public_catalog, spatial_extent, time_start, time_end):
-    collections_url = urljoin(public_catalog.url + "/", 'collections')
-    logging.info(f"Searching collections on {collections_url}")
-    headers = {
-        "Content-Type": "application/geo+json"
-    }
-    try:
-        response = requests.get(collections_url, headers=headers)
-        if response.status_code != 200:
-            logging.info(f"Error searching collections on {collections_url}")
-            return None
-    except Exception as e:
-        logging.info(f"Error searching collections on {collections_url}")
-        logging.info(f"Error message: {e}")
-        return None
-
-    response_as_json_dict = response.json()
-    results = search_collections_on_stac_api(response_as_json_dict, spatial_extent=spatial_extent,
-                                             temporal_extent_start=time_start, temporal_extent_end=time_end)
-
-    data = []
-    for result in results:
-        result['parent_catalog'] = public_catalog.id
-        data.append(result)
-    logging.info(f"Found {len(data)} collections on {collections_url}")
-    return data
-
-
-# #@cached(TTLCache(maxsize=1000, ttl=3600)) # TODO: Find a way to hash this output, this cant do it. Filehash probably can
 def search_collections(time_interval_timestamp: str, public_catalog_id: int = None,
                        spatial_extent_intersects: str or dict = None,
                        spatial_extent_bbox: list[float] = None):
+    """
+    Search the collections harvested from public catalogs.
+
+    :param time_interval_timestamp: Time interval the collections must overlap
+    :param public_catalog_id: Only search collections of this public catalog
+    :param spatial_extent_intersects: GeoJSON feature the collections must intersect
+    :param spatial_extent_bbox: Bounding box the collections must intersect
+    :return: Matching collections ordered by their parent catalog
+    """
+    geom = None
     if spatial_extent_bbox:
         geom = box(*spatial_extent_bbox)
     elif spatial_extent_intersects:
@@ -156,59 +302,31 @@ def search_collections(time_interval_timestamp: str, public_catalog_id: int = No
 
     time_start, time_end = process_timestamp.process_timestamp_dual_string(time_interval_timestamp)
 
-    public_catalog_objects_to_search = []
     if public_catalog_id:
-        public_catalog_objects_to_search.append(PublicCatalog.query.filter_by(id=public_catalog_id).first())
-    else:
-        public_catalog_objects_to_search = PublicCatalog.query.all()
+        _get_public_catalog_ref(public_catalog_id)
 
-    def handle_result(result, public_catalog_id):
-        for i in result:
-           i["parent_catalog"] = public_catalog_id
-           data.append(i)
-
-    greenlets = []
-    data = []
-    _pool = current_app._get_current_object().pool
-    # _pool = ThreadPool(1000)
-    for public_catalog in public_catalog_objects_to_search:
-        logging.info(f"Searching collections for {public_catalog.name}")
-        greenlet = _pool.apply_async(get_collections_for_public_catalog,
-                                    args=(public_catalog, geom, time_start, time_end,),
-                                    callback=functools.partial(handle_result, public_catalog_id=public_catalog.id))
-        greenlets.append(greenlet)
-
-    gevent.joinall(greenlets)
+    # already ordered by parent catalog by the query, so names are filled in without re-sorting
+    data = public_collections_service.search_public_collections(geom, time_start, time_end, public_catalog_id)
     logging.info(f"Found {len(data)} collections")
-    # order data by public_catalog key value
-    data = sorted(data, key=lambda k: k['parent_catalog'])
-    catalog_names = {}
-    for i in range(len(data)):
-        if data[i]['parent_catalog'] not in catalog_names:
-            catalog_names[data[i]['parent_catalog']] = PublicCatalog.query.filter_by(
-                id=data[i]['parent_catalog']).first().name
-
-        data[i]['parent_catalog_name'] = catalog_names[data[i]['parent_catalog']]
+    public_catalogs_by_id = _get_public_catalogs_by_id()
+    if any(i['parent_catalog'] not in public_catalogs_by_id for i in data):
+        public_catalogs_by_id = _get_public_catalogs_by_id(refresh=True)
+    for i in data:
+        public_catalog = public_catalogs_by_id.get(i['parent_catalog'])
+        i['parent_catalog_name'] = public_catalog.name if public_catalog is not None else None
     return data
 
 
-# @cached(TTLCache(maxsize=1000, ttl=3600))
 def get_collections_from_public_catalog_id(public_catalog_id: int):
     catalog = PublicCatalog.query.filter_by(id=public_catalog_id).first()
-    catalog_url = catalog.url
-    collections_url = urljoin(catalog_url + "/", 'collections')
-    return get_collection(collections_url)
+    if catalog is None:
+        raise PublicCatalogDoesNotExistError
+    return get_collection(catalog.url)
 
 
-# @cached(TTLCache(maxsize=1000, ttl=3600))
-def get_collection(collections_url: str):
-    logging.info(f"Getting collections from {collections_url}")
-    headers = {
-        "Content-Type": "application/geo+json"
-    }
-    response = requests.get(collections_url, headers=headers)
-    response_result = response.json()
-    collections = response_result['collections']
+def get_collection(public_catalog_url: str):
+    logging.info(f"Getting collections from {public_catalog_url}")
+    collections = public_collections_service.get_public_catalog_collections(public_catalog_url)
     to_return = []
     for collection in collections:
         spatial_extent = shapely.geometry.MultiPolygon([
@@ -230,48 +348,81 @@ def get_collection(collections_url: str):
     return to_return
 
 
-# #@cached(TTLCache(maxsize=1000, ttl=3600))
 def get_all_available_public_collections():
-    all_public_catalogs = PublicCatalog.query.all()
-    out = []
-    # _pool =  Pool() # You can specify the number of processes to use here. Default is CPU count.
-    _pool = current_app._get_current_object().pool
+    """
+    Get the collections of every stored public catalog.
 
-    def handle_result(result, public_catalog_id):
-        for i in result:
-            # logging.info(f"Found collection: {i['title']}")
-            i["parent_catalog"] = public_catalog_id
-            out.append(i)
+    Catalogs which fail or miss the fan-out deadline are left out of the result.
 
-    greenltes = []
-    for public_catalog in all_public_catalogs:
-        public_catalog_url = public_catalog.url
-        logging.info(f"Catalog url: {public_catalog_url}")
-        # if catalog_url does not end with a slash, add it
-        if not public_catalog_url.endswith('/'):
-            public_catalog_url = public_catalog_url + '/'
-        collections_url = urllib.parse.urljoin(public_catalog_url, 'collections')
-        greenlet = _pool.apply_async(get_collection, args=(collections_url,),
-                                    callback=functools.partial(handle_result, public_catalog_id=public_catalog.id))
-        greenltes.append(greenlet)
-
-    gevent.joinall(greenltes)
+    :return: Collections ordered by their parent catalog
+    """
+    all_public_catalogs = PublicCatalog.query.order_by(PublicCatalog.id).all()
+    outcome = fan_out({public_catalog.id: (public_catalog.url, functools.partial(get_collection, public_catalog.url))
+                       for public_catalog in all_public_catalogs},
+                      max_concurrency=current_app.config["FAN_OUT_MAX_CONCURRENCY"],
+                      max_per_host=current_app.config["FAN_OUT_MAX_PER_HOST"],
+                      deadline=current_app.config["FAN_OUT_DEADLINE_SECONDS"])
+    for public_catalog_id, error in outcome.errors.items():
+        logging.info(f"Error getting collections of public catalog {public_catalog_id}: {error}")
 
+    out = []
+    for public_catalog in all_public_catalogs:
+        for i in outcome.results.get(public_catalog.id, []):
+            i["parent_catalog"] = public_catalog.id
+            out.append(i)
     return out
 
 
-def get_all_stored_public_catalogs() -> List[Dict[any, any]]:
+def get_public_catalogs_health() -> List[Dict[any, any]]:
     """
-    Get all stored public catalogs as a list of dictionaries.
+    Get latency, error rate, last success and circuit state of every stored public catalog.
+
+    :return: Health of the public catalogs as a list of dictionaries
+    """
+    return catalog_health_service.get_public_catalogs_health()
+
+
+def get_all_stored_public_catalogs(page: int = None, per_page: int = None, fields: List[str] = None,
+                                   include_search_parameters: bool = True) -> List[Dict[any, any]]:
+    """
+    Get stored public catalogs as a list of dictionaries.
+
+    The catalogs and all of their stored search parameters are loaded with two queries, regardless of the number of
+    catalogs.
+    :param page: Page to return, starting at 1, None to return all catalogs
+    :param per_page: Number of catalogs per page
+    :param fields: Fields to return, None to return all fields
+    :param include_search_parameters: Whether to include the stored search parameters of each catalog
     :return: Public catalogs as a list of dictionaries
     """
-    all_public_catalogs: [PublicCatalog] = PublicCatalog.query.all()
+    if fields is None:
+        fields = list(_PUBLIC_CATALOG_FIELDS) + ["stored_search_parameters"]
+    include_search_parameters = include_search_parameters and "stored_search_parameters" in fields
+    columns = [getattr(PublicCatalog, field) for field in fields if field in _PUBLIC_CATALOG_FIELDS]
+
+    query = PublicCatalog.query.options(load_only(*columns)).order_by(PublicCatalog.id)
+    if page is not None and per_page is not None:
+        query = query.limit(per_page).offset((page - 1) * per_page)
+    all_public_catalogs: [PublicCatalog] = query.all()
+
+    search_parameters = defaultdict(list)
+    if include_search_parameters and all_public_catalogs:
+        stored_search_parameters = StoredSearchParameters.query.filter(
+            StoredSearchParameters.associated_catalog_id.in_([i.id for i in all_public_catalogs])
+        ).order_by(StoredSearchParameters.id).all()
+        for i in stored_search_parameters:
+            search_parameters[i.associated_catalog_id].append(_stored_search_parameters_as_dict(i))
+
     data = []
     for public_catalog in all_public_catalogs:
-        x = {"id": public_catalog.id, "name": public_catalog.name, "url": public_catalog.url,
-             "description": public_catalog.description,
-             "added_on": public_catalog.added_on.strftime("%m/%d/%Y, %H:%M:%S"),
-             "stored_search_parameters": get_stored_search_parameters_by_catalog_id(public_catalog.id)}
+        x = {}
+        for field in fields:
+            if field == "added_on":
+                x[field] = public_catalog.added_on.strftime("%m/%d/%Y, %H:%M:%S")
+            elif field in _PUBLIC_CATALOG_FIELDS:
+                x[field] = getattr(public_catalog, field)
+        if include_search_parameters:
+            x["stored_search_parameters"] = search_parameters[public_catalog.id]
         data.append(x)
     return data
 
@@ -301,6 +452,7 @@ def remove_public_catalog_via_catalog_id(public_catalog_id: int) -> PublicCatalo
             id=public_catalog_id).first()
         db.session.delete(a)
         db.session.commit()
+        _invalidate_public_catalogs_by_id()
         return a
     except sqlalchemy.orm.exc.UnmappedInstanceError:
         raise CatalogDoesNotExistError
@@ -370,105 +522,143 @@ def update_specific_collections_via_catalog_id(catalog_id: int,
     if public_catalogue_entry is None:
         raise CatalogDoesNotExistError("No catalogue entry found for id: " +
                                        str(catalog_id))
-    stored_search_parameters: [StoredSearchParameters
-                               ] = StoredSearchParameters.query.filter_by(
-        associated_catalog_id=catalog_id).all()
-    stored_search_parameters_to_run = []
-    for stored_search_parameter in stored_search_parameters:
-        used_search_parameters = json.loads(
-            stored_search_parameter.used_search_parameters)
-        used_search_parameters_collections = used_search_parameters[
-            'collections']
-        check = any(item in used_search_parameters_collections
-                    for item in collections)
-        if check:
-            stored_search_parameters_to_run.append(stored_search_parameter)
+    # search parameters are stored once per collection, so the collection column identifies them
+    stored_search_parameters_to_run: [StoredSearchParameters
+                                      ] = StoredSearchParameters.query.filter(
+        StoredSearchParameters.associated_catalog_id == catalog_id,
+        StoredSearchParameters.collection.in_(collections)).all()
 
     _run_ingestion_task_force_update(
         stored_search_parameters_to_run)
 
 
-def _call_ingestion_microservice(parameters, source_stac_catalog_url: str, update=False) -> int:
+def _call_ingestion_microservice(parameters, source_stac_catalog_url: str, update=False,
+                                 priority: str = ingestion_scheduler_service.INGESTION_PRIORITY_INTERACTIVE) -> int:
+    callback_id = _call_ingestion_microservice_batch([(parameters, source_stac_catalog_url, update)], priority)[0]
+    if callback_id is None:
+        raise ValueError("Source STAC API URL not found in public catalogs.")
+    return callback_id
+
+
+def _call_ingestion_microservice_batch(
+        jobs: List[tuple],
+        priority: str = ingestion_scheduler_service.INGESTION_PRIORITY_INTERACTIVE) -> List[Optional[int]]:
+    """
+    Submit several jobs to the ingestion microservice.
+
+    The status entries of all jobs are created in one transaction and all payloads are staged with a single script,
+    so the number of round trips does not depend on the number of jobs. Jobs identical to one already queued or
+    running are not submitted again, they get the callback id of the job in flight. Staged jobs are handed to the
+    ingester by priority class, and in turns per source catalog within a class.
+
+    :param jobs: STAC search parameters, source STAC catalog url and update flag of each job
+    :param priority: Priority class of the jobs, one of ingestion_scheduler_service.INGESTION_PRIORITIES
+    :return: Callback ids of the jobs which can be used to check the status of the ingestion, None for jobs which were
+        skipped because their source catalog is not stored
+    """
+    if not jobs:
+        return []
     target_stac_catalog_url = current_app.config['WRITE_STAC_API_SERVER']
-    callback_id = make_stac_ingestion_status_entry(source_stac_catalog_url, target_stac_catalog_url, update)
-    payload = {
+    entries = make_coalesced_stac_ingestion_status_entries([
+        (source_stac_catalog_url, target_stac_catalog_url, update,
+         get_ingestion_job_hash(source_stac_catalog_url, target_stac_catalog_url, update, parameters))
+        for parameters, source_stac_catalog_url, update in jobs])
+    payloads = [(source_stac_catalog_url, json.dumps({
         "source_stac_catalog_url": source_stac_catalog_url,
         "target_stac_catalog_url": target_stac_catalog_url,
         "update": update,
         "callback_id": callback_id,
         "stac_search_parameters": parameters
+    })) for (parameters, source_stac_catalog_url, update), (callback_id, new) in zip(jobs, entries) if new]
+    if payloads:
+        try:
+            ingestion_scheduler_service.enqueue_ingestion_jobs(payloads, priority)
+        except Exception:
+            release_in_flight_ingestions([callback_id for callback_id, new in entries if new])
+            raise
+    return [callback_id for callback_id, _ in entries]
+
+
+def get_search_parameters_hash(used_search_parameters: str) -> str:
+    """
+    Hash serialised search parameters for the unique index of stored search parameters.
+
+    :param used_search_parameters: Search parameters as stored in the used_search_parameters column
+    :return: Hex digest of the sha256 of the search parameters
+    """
+    return hashlib.sha256(used_search_parameters.encode()).hexdigest()
+
+
+def _make_stored_search_parameters(associated_catalogue_id: int, parameters: dict,
+                                   collection: str = None) -> Dict[str, any]:
+    used_search_parameters = json.dumps(parameters)
+    return {
+        "associated_catalog_id": associated_catalogue_id,
+        "used_search_parameters": used_search_parameters,
+        "used_search_parameters_hash": get_search_parameters_hash(used_search_parameters),
+        "collection": collection if collection is not None else "",
+        "bbox": json.dumps(parameters['bbox']) if 'bbox' in parameters else "[]",
+        "datetime": json.dumps(parameters['datetime']) if 'datetime' in parameters else "",
     }
-    microservice_redis_key = "stac_selective_ingester_input_list"
-    redis_host = current_app.config['REDIS_HOST']
-    redis_port = current_app.config['REDIS_PORT']
-    redis_client = redis.Redis(host=redis_host, port=redis_port)
-    redis_client.rpush(microservice_redis_key, json.dumps(payload))
-    return callback_id
 
 
 def _store_search_parameters(associated_catalogue_id,
-                             parameters: dict) -> None:
+                             parameters: dict) -> int:
     """
     Store the search parameters used to load the collections into the database.
 
+    The parameters are stored once per collection with a single INSERT, search parameters which are already stored are
+    skipped.
+
     :param associated_catalogue_id: Catalogue id of the catalogue the collections were loaded from
     :param parameters: STAC Filter parameters
+    :return: Number of newly stored search parameters
     """
-    try:
+    if 'collections' in parameters:
+        rows = []
         for collection in parameters['collections']:
             filtered_parameters = parameters.copy()
             filtered_parameters['collections'] = [collection]
+            rows.append(_make_stored_search_parameters(associated_catalogue_id, filtered_parameters, collection))
+    else:
+        rows = [_make_stored_search_parameters(associated_catalogue_id, parameters.copy())]
+    if not rows:
+        return 0
 
-            try:
-                stored_search_parameters = StoredSearchParameters()
-                stored_search_parameters.associated_catalog_id = associated_catalogue_id
-                stored_search_parameters.used_search_parameters = json.dumps(
-                    filtered_parameters)
-                stored_search_parameters.collection = collection
-                try:
-                    stored_search_parameters.bbox = json.dumps(
-                        filtered_parameters['bbox'])
-                except KeyError:
-                    pass
-                try:
-                    stored_search_parameters.datetime = json.dumps(
-                        filtered_parameters['datetime'])
-                except KeyError:
-                    pass
-
-                db.session.add(stored_search_parameters)
-                db.session.commit()
-                logging.info(f"Stored search parameters for collection {collection}")
-            except sqlalchemy.exc.IntegrityError:
-                # exact same search parameters already exist, no need to store them again
-                pass
-            finally:
-                db.session.rollback()
-    except KeyError:
-        filtered_parameters = parameters.copy()
-        try:
-            stored_search_parameters = StoredSearchParameters()
-            stored_search_parameters.associated_catalog_id = associated_catalogue_id
-            stored_search_parameters.used_search_parameters = json.dumps(
-                filtered_parameters)
-            try:
-                stored_search_parameters.bbox = json.dumps(
-                    filtered_parameters['bbox'])
-            except KeyError:
-                pass
-            try:
-                stored_search_parameters.datetime = json.dumps(
-                    filtered_parameters['datetime'])
-            except KeyError:
-                pass
-
-            db.session.add(stored_search_parameters)
-            db.session.commit()
-        except sqlalchemy.exc.IntegrityError:
-            # exact same search parameters already exist, no need to store them again
-            pass
-        finally:
-            db.session.rollback()
+    statement = postgresql.insert(StoredSearchParameters.__table__).values(rows).on_conflict_do_nothing(
+        index_elements=["used_search_parameters_hash"]).returning(StoredSearchParameters.id)
+    try:
+        stored_count = len(db.session.execute(statement).fetchall())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logging.info(f"Stored {stored_count} new search parameters for catalog {associated_catalogue_id}")
+    return stored_count
+
+
+def backfill_search_parameters_hashes(batch_size: int = 1000) -> int:
+    """
+    Fill in the hash of stored search parameters stored before the hash column existed.
+
+    :param batch_size: Number of search parameters updated per transaction
+    :return: Number of updated search parameters
+    """
+    updated = 0
+    while True:
+        rows = db.session.query(StoredSearchParameters.id, StoredSearchParameters.used_search_parameters).filter(
+            StoredSearchParameters.used_search_parameters_hash.is_(None)).order_by(
+            StoredSearchParameters.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.bulk_update_mappings(StoredSearchParameters, [
+            {"id": id, "used_search_parameters_hash": get_search_parameters_hash(used_search_parameters)}
+            for id, used_search_parameters in rows
+        ])
+        db.session.commit()
+        updated += len(rows)
+    logging.info(f"Backfilled the hash of {updated} stored search parameters")
+    return updated
 
 
 def remove_search_params_for_collection_id(collection_id: str) -> int:
@@ -497,19 +687,18 @@ def _run_ingestion_task_force_update(
     :param stored_search_parameters: List of stored search parameters to run the ingestion task for
     :return: List of work session ids which can be used to check the status of the ingestion
     """
-    responses_from_ingestion_microservice = []
+    jobs = []
     for i in stored_search_parameters:
         i: StoredSearchParameters
         try:
             used_search_parameters = json.loads(i.used_search_parameters)
-            catalog_url = PublicCatalog.query.filter_by(id=i.associated_catalog_id).first().url
-            microservice_response = _call_ingestion_microservice(
-                used_search_parameters, source_stac_catalog_url=catalog_url, update=True)
-            responses_from_ingestion_microservice.append(
-                microservice_response)
-        except ValueError:
-            pass
-    return responses_from_ingestion_microservice
+            catalog_url = _get_public_catalog_ref(i.associated_catalog_id).url
+            jobs.append((used_search_parameters, catalog_url, True))
+        except (ValueError, PublicCatalogDoesNotExistError):
+            logging.info(f"Skipping stored search parameters {i.id}, they can not be run")
+    responses_from_ingestion_microservice = _call_ingestion_microservice_batch(
+        jobs, ingestion_scheduler_service.INGESTION_PRIORITY_SCHEDULED)
+    return [i for i in responses_from_ingestion_microservice if i is not None]
 
 
 def get_stored_search_parameters_by_catalog_id(catalog_id: int) -> List[Dict[any, any]]:
@@ -519,18 +708,19 @@ def get_stored_search_parameters_by_catalog_id(catalog_id: int) -> List[Dict[any
     :param catalog_id: Catalog id to get stored search parameters for
     :return: List of stored search parameters
     """
-    to_return = []
     data = StoredSearchParameters.query.filter_by(associated_catalog_id=catalog_id).all()
-    for i in data:
-        to_return.append({
-            "id": i.id,
-            "collection": i.collection,
-            "bbox": json.loads(i.bbox),
-            "datetime": json.loads(i.datetime),
-            "used_search_parameters": json.loads(i.used_search_parameters),
-            "associated_catalog_id": i.associated_catalog_id
-        })
-    return to_return
+    return [_stored_search_parameters_as_dict(i) for i in data]
+
+
+def _stored_search_parameters_as_dict(stored_search_parameters: StoredSearchParameters) -> Dict[any, any]:
+    return {
+        "id": stored_search_parameters.id,
+        "collection": stored_search_parameters.collection,
+        "bbox": json.loads(stored_search_parameters.bbox),
+        "datetime": json.loads(stored_search_parameters.datetime),
+        "used_search_parameters": json.loads(stored_search_parameters.used_search_parameters),
+        "associated_catalog_id": stored_search_parameters.associated_catalog_id
+    }
 
 
 def run_search_parameters(parameter_id: int) -> int:
@@ -544,6 +734,7 @@ def run_search_parameters(parameter_id: int) -> int:
     if stored_search_parameters is None:
         raise StoredSearchParametersDoesNotExistError
     used_search_parameters = json.loads(stored_search_parameters.used_search_parameters)
-    microservice_response = _call_ingestion_microservice(used_search_parameters, PublicCatalog.query.filter_by(
-        id=stored_search_parameters.associated_catalog_id).first().url, update=True)
+    microservice_response = _call_ingestion_microservice(
+        used_search_parameters, _get_public_catalog_ref(stored_search_parameters.associated_catalog_id).url,
+        update=True)
     return microservice_response
@@ -0,0 +1,286 @@
+import datetime
+import functools
+import json
+import logging
+import threading
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+import gevent
+import shapely
+from flask import current_app
+from flask.app import Flask
+from sqlalchemy import func, or_
+
+from . import catalog_health_service
+from .. import db
+from ..custom_exceptions import *
+from ..model.collection_model import PublicCollection
+from ..model.public_catalogs_model import PublicCatalog
+from ..util import process_timestamp
+from ..util.fan_out import fan_out
+from ..util.http_client import get_http_request_budget, get_http_session
+from ..util.redis_client import get_redis_client
+from ..util.shared_cache import SharedCache
+
+
+def _fetch_public_catalog_collections(public_catalog_url: str) -> List[Dict[str, Any]]:
+    """
+    Fetch the raw collection documents from a public catalog through its circuit breaker.
+
+    :param public_catalog_url: Url of the public catalog
+    :return: List of STAC collection documents
+    """
+    collections_url = urljoin(public_catalog_url + "/", 'collections')
+    logging.info(f"Harvesting collections from {collections_url}")
+    headers = {
+        "Content-Type": "application/geo+json"
+    }
+
+    def fetch():
+        response = get_http_session().get(collections_url, headers=headers)
+        response.raise_for_status()
+        return response.json()['collections']
+
+    return catalog_health_service.call_public_catalog(public_catalog_url, fetch)
+
+
+_public_catalog_collections_cache: SharedCache = None
+
+
+def _get_public_catalog_collections_cache() -> SharedCache:
+    global _public_catalog_collections_cache
+    if _public_catalog_collections_cache is None:
+        _public_catalog_collections_cache = SharedCache(
+            "public_catalog_collections",
+            fresh_ttl=current_app.config["PUBLIC_CATALOG_CACHE_TTL_SECONDS"],
+            stale_ttl=current_app.config["PUBLIC_CATALOG_CACHE_STALE_TTL_SECONDS"],
+            l1_ttl=current_app.config["PUBLIC_CATALOG_CACHE_L1_TTL_SECONDS"],
+            # the lock must outlive a slow fetch, or waiting workers give up and every one of them fetches the listing
+            lock_timeout=get_http_request_budget(current_app.config))
+    return _public_catalog_collections_cache
+
+
+def get_public_catalog_collections(public_catalog_url: str) -> List[Dict[str, Any]]:
+    """
+    Get the raw collection documents of a public catalog through the shared cache.
+
+    :param public_catalog_url: Url of the public catalog
+    :return: List of STAC collection documents
+    """
+    return _get_public_catalog_collections_cache().get(
+        public_catalog_url, functools.partial(_fetch_public_catalog_collections, public_catalog_url))
+
+
+def _harvest_public_catalog_collections(public_catalog_url: str) -> List[Dict[str, Any]]:
+    # the harvest runs about as often as cached listings expire, so reading through the cache would store listings up
+    # to two intervals old. Fetch directly and hand the fresh listing to the cache instead.
+    collections = _fetch_public_catalog_collections(public_catalog_url)
+    _get_public_catalog_collections_cache().set(public_catalog_url, collections)
+    return collections
+
+
+def _spatial_extent_wkt(collection: Dict[str, Any]) -> str:
+    """
+    Build a MULTIPOLYGON WKT from the bounding boxes of a STAC collection.
+
+    3D bounding boxes are flattened and bounding boxes crossing the antimeridian are split in two.
+    """
+    polygons = []
+    for bbox in collection["extent"]["spatial"]["bbox"]:
+        if len(bbox) == 6:
+            bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+        min_x, min_y, max_x, max_y = bbox
+        if min_x > max_x:
+            polygons.append(shapely.geometry.box(min_x, min_y, 180, max_y))
+            polygons.append(shapely.geometry.box(-180, min_y, max_x, max_y))
+        else:
+            polygons.append(shapely.geometry.box(min_x, min_y, max_x, max_y))
+    return shapely.geometry.MultiPolygon(polygons).wkt
+
+
+def _parse_collection_timestamp(timestamp: str or None) -> datetime.datetime or None:
+    try:
+        return process_timestamp.to_naive_utc(process_timestamp.process_timestamp_single_string(timestamp))
+    except ConvertingTimestampError:
+        return None
+
+
+def _make_public_collection(public_catalog_id: int, collection: Dict[str, Any],
+                            harvested_on: datetime.datetime) -> Dict[str, Any]:
+    interval = collection["extent"]["temporal"]["interval"]
+    return {
+        "id": collection["id"],
+        "type": collection.get("type", "Collection"),
+        "title": collection.get("title", ""),
+        "description": collection.get("description", ""),
+        "temporal_extent_start": _parse_collection_timestamp(interval[0][0]),
+        "temporal_extent_end": _parse_collection_timestamp(interval[-1][1]),
+        "spatial_extent": _spatial_extent_wkt(collection),
+        "parent_catalog_id": public_catalog_id,
+        "stac_collection": json.dumps(collection),
+        "harvested_on": harvested_on,
+    }
+
+
+def store_harvested_collections(public_catalog_id: int, collections: List[Dict[str, Any]]) -> int:
+    """
+    Replace the harvested collections of a public catalog in a single transaction.
+
+    Collections that can not be parsed are skipped.
+
+    :param public_catalog_id: Id of the public catalog the collections were harvested from
+    :param collections: Raw STAC collection documents
+    :return: Number of stored collections
+    """
+    harvested_on = datetime.datetime.utcnow()
+    rows = []
+    for collection in collections:
+        try:
+            rows.append(_make_public_collection(public_catalog_id, collection, harvested_on))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logging.info(f"Skipping collection {collection.get('id')} of catalog {public_catalog_id}: {e}")
+    try:
+        PublicCollection.query.filter_by(parent_catalog_id=public_catalog_id).delete()
+        if rows:
+            db.session.bulk_insert_mappings(PublicCollection, rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+def harvest_public_catalogs(public_catalogs: List[PublicCatalog]) -> Dict[int, int]:
+    """
+    Harvest the collections of public catalogs into the public collections table.
+
+    Collections are fetched from the catalogs directly, not through the shared cache, which is refreshed with them.
+    Catalogs that fail to respond keep their previously harvested collections.
+
+    :param public_catalogs: Public catalogs to harvest
+    :return: Number of harvested collections per public catalog id, catalogs that failed are left out
+    """
+    outcome = fan_out({public_catalog.id: (public_catalog.url,
+                                           functools.partial(_harvest_public_catalog_collections, public_catalog.url))
+                       for public_catalog in public_catalogs},
+                      max_concurrency=current_app.config["FAN_OUT_MAX_CONCURRENCY"],
+                      max_per_host=current_app.config["FAN_OUT_MAX_PER_HOST"],
+                      deadline=current_app.config["PUBLIC_COLLECTIONS_HARVEST_DEADLINE_SECONDS"])
+    for public_catalog_id, error in outcome.errors.items():
+        logging.info(f"Error harvesting collections of public catalog {public_catalog_id}: {error}")
+
+    harvested = {}
+    for public_catalog_id, collections in outcome.results.items():
+        harvested[public_catalog_id] = store_harvested_collections(public_catalog_id, collections)
+    logging.info(f"Harvested {sum(harvested.values())} collections from {len(harvested)} public catalogs")
+    return harvested
+
+
+def harvest_all_public_catalogs() -> Dict[int, int]:
+    """
+    Harvest the collections of every stored public catalog into the public collections table.
+
+    :return: Number of harvested collections per public catalog id, catalogs that failed are left out
+    """
+    return harvest_public_catalogs(PublicCatalog.query.all())
+
+
+def start_public_catalogs_harvest(public_catalog_ids: List[int]) -> None:
+    """
+    Harvest newly stored public catalogs in the background, so they show up in collection searches right away
+    instead of after the next periodic harvest.
+
+    :param public_catalog_ids: Ids of the public catalogs to harvest
+    """
+    if not public_catalog_ids:
+        return
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                harvest_public_catalogs(PublicCatalog.query.filter(PublicCatalog.id.in_(public_catalog_ids)).all())
+            except Exception as e:
+                logging.error(f"Harvesting public catalogs {public_catalog_ids} failed: {e}")
+            finally:
+                db.session.remove()
+
+    # a plain thread also runs under the unpatched development server, pywsgi.py turns it into a greenlet
+    threading.Thread(target=run, daemon=True).start()
+
+
+def start_public_collections_harvester(app: Flask) -> gevent.Greenlet:
+    """
+    Start a greenlet which periodically harvests collections of all public catalogs.
+
+    A marker in Redis makes sure only one worker across all replicas harvests in each interval. When the harvest fails,
+    or some catalogs fail, the marker is cut short so the harvest is retried after
+    PUBLIC_COLLECTIONS_HARVEST_RETRY_SECONDS.
+
+    :param app: Flask app providing the context for the harvester
+    :return: The harvester greenlet
+    """
+    interval = app.config["PUBLIC_COLLECTIONS_HARVEST_INTERVAL_SECONDS"]
+    retry = min(app.config["PUBLIC_COLLECTIONS_HARVEST_RETRY_SECONDS"], interval)
+    marker = "stac_portal:public_collections_harvest"
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    client = get_redis_client()
+                    if client.set(marker, 1, nx=True, ex=interval):
+                        try:
+                            public_catalogs = PublicCatalog.query.all()
+                            if len(harvest_public_catalogs(public_catalogs)) < len(public_catalogs):
+                                client.expire(marker, retry)
+                        except Exception:
+                            client.delete(marker)
+                            raise
+                except Exception as e:
+                    logging.error(f"Public collections harvest failed: {e}")
+                finally:
+                    db.session.remove()
+            # check for the marker more often than it is set, so a cut short marker is retried in time
+            gevent.sleep(retry)
+
+    return gevent.spawn(run)
+
+
+def search_public_collections(spatial_extent: shapely.geometry.base.BaseGeometry = None,
+                              time_start: datetime.datetime = None,
+                              time_end: datetime.datetime = None,
+                              public_catalog_id: int = None) -> List[Dict[str, Any]]:
+    """
+    Search harvested public collections intersecting a geometry and a time range.
+
+    :param spatial_extent: Geometry the collections must intersect, None to skip the spatial filter
+    :param time_start: Start of the time range, None for an open start
+    :param time_end: End of the time range, None for an open end
+    :param public_catalog_id: Only search collections of this public catalog
+    :return: STAC collection documents ordered by their parent catalog
+    """
+    time_start = process_timestamp.to_naive_utc(time_start)
+    time_end = process_timestamp.to_naive_utc(time_end)
+    query = PublicCollection.query
+    if spatial_extent is not None:
+        query = query.filter(func.ST_Intersects(PublicCollection.spatial_extent,
+                                                func.ST_GeomFromText(spatial_extent.wkt)))
+    if time_start is not None:
+        query = query.filter(or_(PublicCollection.temporal_extent_end.is_(None),
+                                 PublicCollection.temporal_extent_end >= time_start))
+    if time_end is not None:
+        query = query.filter(or_(PublicCollection.temporal_extent_start.is_(None),
+                                 PublicCollection.temporal_extent_start <= time_end))
+    if public_catalog_id is not None:
+        query = query.filter(PublicCollection.parent_catalog_id == public_catalog_id)
+    query = query.with_entities(PublicCollection.parent_catalog_id, PublicCollection.stac_collection) \
+        .order_by(PublicCollection.parent_catalog_id, PublicCollection._id)
+
+    data = []
+    for parent_catalog_id, stac_collection in query.all():
+        collection = json.loads(stac_collection)
+        collection['parent_catalog'] = parent_catalog_id
+        data.append(collection)
+    return data
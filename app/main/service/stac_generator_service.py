@@ -1,6 +1,8 @@
 from flask import current_app
 import requests
 
+from ..util.http_client import get_http_session
+
 
 def create_STAC_Item(data):
     """
@@ -16,7 +18,7 @@ def create_STAC_Item(data):
         Exception: If the API request fails for any reason.
     """
     try:
-        response = requests.post(current_app.config["STAC_GENERATOR_ENDPOINT"], json=data)
+        response = get_http_session().post(current_app.config["STAC_GENERATOR_ENDPOINT"], json=data)
         response.raise_for_status()
     except requests.exceptions.RequestException as err:
         print(f"Request failed: {err}")
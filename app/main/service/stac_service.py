@@ -1,5 +1,7 @@
-from typing import Dict, Tuple
-from urllib.parse import urljoin
+import json
+import logging
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import urlencode, urljoin
 
 import requests
 from flask import Response
@@ -7,82 +9,177 @@ from flask import current_app
 
 from . import public_catalogs_service
 from ..custom_exceptions import *
+from ..util.http_client import get_http_session
+from ..util.response_cache import ResponseCache
+
+ITEM_STREAM_FORMATS = ("geojson", "ndjson")
+
+_stac_response_cache: ResponseCache = None
+
+
+def _get_stac_response_cache() -> ResponseCache:
+    global _stac_response_cache
+    if _stac_response_cache is None:
+        _stac_response_cache = ResponseCache(current_app.config["STAC_RESPONSE_CACHE_TTL_SECONDS"],
+                                             current_app.config["STAC_RESPONSE_CACHE_MAX_BYTES"],
+                                             current_app.config["STAC_RESPONSE_CACHE_MAX_ENTRIES"])
+    return _stac_response_cache
+
+
+def _get_from_read_stac_api(url: str) -> Tuple[int, any]:
+    status_code, content = _get_stac_response_cache().get(url, get_http_session())
+    return status_code, json.loads(content)
+
+
+def _invalidate_cached_collection(collection_id: str = None) -> None:
+    """
+    Drop cached read responses affected by a write to a collection or its items.
+
+    :param collection_id: Id of the written collection, None if only the collection list is affected
+    """
+    collections_url = urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/")
+    _get_stac_response_cache().invalidate(collections_url)
+    if collection_id:
+        _get_stac_response_cache().invalidate_tree(collections_url + collection_id)
 
 
 def get_all_collections() -> Dict[str, any]:
-    response = requests.get(urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/"))
-    if response.status_code in range(200, 203):
-        collection_json = response.json()
-        return collection_json
+    status_code, response_json = _get_from_read_stac_api(
+        urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/"))
+    if status_code in range(200, 203):
+        return response_json
     else:
-        resp = response.json()
-        resp["error_code"] = response.status_code
-        return resp
+        response_json["error_code"] = status_code
+        return response_json
 
 
 def get_collection_by_id(
         collection_id: str) -> Dict[str, any]:
-    response = requests.get(urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/") + collection_id)
-    if response.status_code in range(200, 203):
-        collection_json = response.json()
-        return collection_json
-    elif response.status_code == 404:
+    status_code, response_json = _get_from_read_stac_api(
+        urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/") + collection_id)
+    if status_code in range(200, 203):
+        return response_json
+    elif status_code == 404:
         raise CollectionDoesNotExistError
-    elif response.status_code == 424:
+    elif status_code == 424:
         raise CollectionDoesNotExistError
     else:
-        resp = response.json()
-        resp["error_code"] = response.status_code
-        return resp
+        response_json["error_code"] = status_code
+        return response_json
 
 
 def get_items_by_collection_id(
-        collection_id: str) -> Dict[str, any]:
-    response = requests.get(
-        urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/") + collection_id + "/items")
+        collection_id: str, limit: int = None, token: str = None, bbox: str = None,
+        datetime: str = None) -> Dict[str, any]:
+    status_code, response_json = _get_from_read_stac_api(
+        _items_url(collection_id, limit=limit, token=token, bbox=bbox, datetime=datetime))
 
-    if response.status_code in range(200, 203):
-        collection_json = response.json()
-        return collection_json
-    elif response.status_code == 404:
+    if status_code in range(200, 203):
+        return response_json
+    elif status_code == 404:
         raise CollectionDoesNotExistError
-    elif response.status_code == 424:
+    elif status_code == 424:
         raise CollectionDoesNotExistError
     else:
-        resp = response.json()
-        resp["error_code"] = response.status_code
-        return resp
+        response_json["error_code"] = status_code
+        return response_json
+
+
+def stream_items_by_collection_id(
+        collection_id: str, limit: int = None, bbox: str = None, datetime: str = None,
+        output_format: str = "geojson") -> Iterator[str]:
+    """
+    Stream every item of a collection by following the next links of the STAC API.
+
+    Only one page is held in memory at a time, so memory use does not grow with the size of the collection.
+    The first page is requested before returning, so a missing collection is reported before streaming starts.
+
+    :param collection_id: Id of the collection
+    :param limit: Page size requested from the STAC API
+    :param bbox: Comma separated bounding box filter
+    :param datetime: Datetime filter
+    :param output_format: "geojson" for a single FeatureCollection, "ndjson" for one feature per line
+    :return: Iterator of response chunks
+    """
+    response = get_http_session().get(_items_url(collection_id, limit=limit, bbox=bbox, datetime=datetime))
+    if response.status_code in (404, 424):
+        raise CollectionDoesNotExistError
+    response.raise_for_status()
+    pages = _iter_item_pages(response.json())
+
+    if output_format == "ndjson":
+        return ("".join(json.dumps(feature) + "\n" for feature in features) for features in pages if features)
+    return _stream_feature_collection(pages)
+
+
+def _items_url(collection_id: str, **params) -> str:
+    url = urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/") + collection_id + "/items"
+    params = {key: value for key, value in params.items() if value is not None}
+    if params:
+        url = url + "?" + urlencode(params)
+    return url
+
+
+def _iter_item_pages(page: Dict[str, any]) -> Iterator[List[Dict[str, any]]]:
+    while True:
+        yield page.get("features", [])
+        next_link = next((link for link in page.get("links", []) if link.get("rel") == "next"), None)
+        if next_link is None:
+            return
+        if next_link.get("method", "GET").upper() == "POST":
+            response = get_http_session().post(next_link["href"], json=next_link.get("body"),
+                                               headers=next_link.get("headers"))
+        else:
+            response = get_http_session().get(next_link["href"], headers=next_link.get("headers"))
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            # the status code was already sent, abort the stream so the client sees an incomplete document
+            logging.error(f"Error following next link {next_link['href']}: {e}")
+            raise
+        page = response.json()
+
+
+def _stream_feature_collection(pages: Iterator[List[Dict[str, any]]]) -> Iterator[str]:
+    yield '{"type": "FeatureCollection", "features": ['
+    first = True
+    for features in pages:
+        if not features:
+            continue
+        chunk = ", ".join(json.dumps(feature) for feature in features)
+        yield chunk if first else ", " + chunk
+        first = False
+    yield "]}"
 
 
 def get_item_from_collection(
         collection_id: str,
         item_id: str) -> Dict[str, any]:
-    response = requests.get(
+    status_code, response_json = _get_from_read_stac_api(
         urljoin(current_app.config["READ_STAC_API_SERVER"], "collections/") + collection_id + "/items/" + item_id)
 
-    if response.status_code in range(200, 203):
-        collection_json = response.json()
-        return collection_json
-    elif response.status_code == 404:
-        if "collection" in response.json()["description"].lower() and \
-                "does not exist" in response.json()["description"].lower():
+    if status_code in range(200, 203):
+        return response_json
+    elif status_code == 404:
+        if "collection" in response_json["description"].lower() and \
+                "does not exist" in response_json["description"].lower():
             raise CollectionDoesNotExistError
-        elif "item" in response.json()["description"].lower() and \
-                "does not exist" in response.json()["description"].lower():
+        elif "item" in response_json["description"].lower() and \
+                "does not exist" in response_json["description"].lower():
             raise ItemDoesNotExistError
-    elif response.status_code == 424:
+    elif status_code == 424:
         raise CollectionDoesNotExistError
     else:
-        resp = response.json()
-        resp["error_code"] = response.status_code
-        return resp
+        response_json["error_code"] = status_code
+        return response_json
 
 
 def create_new_collection_on_stac_api(
         collection_data: Dict[str,
                               any]) -> Dict[str, any]:
-    response = requests.post(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/"),
+    response = get_http_session().post(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/"),
                              json=collection_data)
+    _invalidate_cached_collection(collection_data.get("id"))
 
     if response.status_code in range(200, 203):
         collection_json = response.json()
@@ -100,7 +197,8 @@ def create_new_collection_on_stac_api(
 def update_existing_collection_on_stac_api(
         collection_data: Dict[str,
                               any]) -> Dict[str, any]:
-    response = requests.put(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/"), json=collection_data)
+    response = get_http_session().put(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/"), json=collection_data)
+    _invalidate_cached_collection(collection_data.get("id"))
 
     if response.status_code in range(200, 203):
         collection_json = response.json()
@@ -121,7 +219,8 @@ def update_existing_collection_on_stac_api(
 
 
 def remove_collection(collection_id: str) -> Dict[str, any]:
-    response = requests.delete(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/") + collection_id)
+    response = get_http_session().delete(urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/") + collection_id)
+    _invalidate_cached_collection(collection_id)
     if response.status_code in range(200, 203):
         collection_json = response.json()
         return collection_json
@@ -138,9 +237,10 @@ def remove_collection(collection_id: str) -> Dict[str, any]:
 def add_stac_item(
         collection_id: str,
         item_data: Dict[str, any]) -> Dict[str, any]:
-    response = requests.post(
+    response = get_http_session().post(
         urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/") + collection_id + "/items",
         json=item_data, headers={"Content-Type": "application/json"})
+    _invalidate_cached_collection(collection_id)
 
     if response.status_code in range(200, 203):
         collection_json = response.json()
@@ -162,10 +262,11 @@ def add_stac_item(
 def update_stac_item(
         collection_id: str, item_id: str,
         item_data: Dict[str, any]):
-    response = requests.put(
+    response = get_http_session().put(
         urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/") + collection_id + "/items/" +
         item_id,
         json=item_data)
+    _invalidate_cached_collection(collection_id)
 
     if response.status_code in range(200, 203):
         collection_json = response.json()
@@ -185,8 +286,9 @@ def update_stac_item(
 def remove_stac_item(
         collection_id: str,
         item_id: str):
-    response = requests.delete(
+    response = get_http_session().delete(
         urljoin(current_app.config["WRITE_STAC_API_SERVER"], "collections/") + collection_id + "/items/" + item_id)
+    _invalidate_cached_collection(collection_id)
 
     if response.status_code in range(200, 203):
         collection_json = response.json()
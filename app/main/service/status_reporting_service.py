@@ -1,23 +1,155 @@
 import datetime
+import hashlib
 import json
-from typing import Dict, Tuple, List
+import logging
+import os
+import socket
+import time
+from typing import Dict, Optional, Tuple, List
 
+import gevent
 import redis
 from flask import current_app
+from flask.app import Flask
+from gevent.queue import Empty
+from sqlalchemy import Date, and_, bindparam, cast, func, insert, select, update
+from sqlalchemy.dialects import postgresql
 
 from app.main.model.public_catalogs_model import PublicCatalog
+from . import ingestion_scheduler_service
 from .. import db
-from ..model.status_reporting_model import StacIngestionStatus
+from ..model.status_reporting_model import StacIngestionStatus, StacIngestionStatusDailySummary
+from ..util import process_timestamp
+from ..util.event_stream import RedisChannelBroadcaster
+from ..util.redis_client import get_redis_client
 
+_INGESTER_OUTPUT_KEY = "stac_selective_ingester_output_list"
+_RESULTS_CONSUMERS_KEY = "stac_portal:ingestion_results_consumers"
+_RESULTS_CONSUMER_HEARTBEAT_KEY_PREFIX = "stac_portal:ingestion_results_consumer:"
+# results move to the processing list of a consumer and only leave it once they are committed. A batch left there by a
+# failed attempt is retried before taking new results.
+_CLAIM_RESULTS_SCRIPT = """
+if redis.call('LLEN', KEYS[2]) > 0 then
+    return redis.call('LRANGE', KEYS[2], 0, -1)
+end
+local messages = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #messages > 0 then
+    redis.call('LTRIM', KEYS[1], #messages, -1)
+    for _, message in ipairs(messages) do
+        redis.call('RPUSH', KEYS[2], message)
+    end
+end
+return messages
+"""
+# hand the unacknowledged results of a consumer which died back to the head of the output list, keeping their order
+_RECLAIM_RESULTS_SCRIPT = """
+local message = redis.call('RPOP', KEYS[2])
+while message do
+    redis.call('LPUSH', KEYS[1], message)
+    message = redis.call('RPOP', KEYS[2])
+end
+"""
+_STATUS_EVENTS_CHANNEL = "stac_portal:stac_ingestion_status_events"
+_status_events_broadcaster = RedisChannelBroadcaster(_STATUS_EVENTS_CHANNEL)
+_IN_FLIGHT_KEY_PREFIX = "stac_portal:ingestion_in_flight:"
+_IN_FLIGHT_CALLBACK_KEY_PREFIX = "stac_portal:ingestion_in_flight_callback:"
+_IN_FLIGHT_PENDING = b"pending"
+_IN_FLIGHT_WAIT_SECONDS = 5
+_IN_FLIGHT_POLL_SECONDS = 0.05
+# only release the in-flight key if it still points to the finished job
+_RELEASE_IN_FLIGHT_SCRIPT = """
+local job_hash = redis.call('GET', KEYS[1])
+if job_hash then
+    if redis.call('GET', ARGV[1] .. job_hash) == ARGV[2] then
+        redis.call('DEL', ARGV[1] .. job_hash)
+    end
+    redis.call('DEL', KEYS[1])
+end
+"""
+STAC_INGESTION_STATUS_STATES = ("running", "finished", "errored")
+_DEFAULT_PAGE_SIZE = 100
+_MAX_PAGE_SIZE = 1000
 
-def get_all_stac_ingestion_statuses() -> List[Dict[any, any]]:
-    _process_stac_ingestion_statuses_redis_list()
-    a: [StacIngestionStatus] = StacIngestionStatus.query.all()
-    return [i.as_dict() for i in a]
+
+def _state_condition(state: str):
+    if state == "running":
+        return StacIngestionStatus.time_finished.is_(None)
+    errored = and_(StacIngestionStatus.error_message.isnot(None), StacIngestionStatus.error_message != "")
+    if state == "errored":
+        return and_(StacIngestionStatus.time_finished.isnot(None), errored)
+    if state == "finished":
+        return and_(StacIngestionStatus.time_finished.isnot(None), ~errored)
+    raise ValueError(f"State must be one of {', '.join(STAC_INGESTION_STATUS_STATES)}")
+
+
+def _filter_stac_ingestion_statuses(query, source_stac_api_url: str = None, time_interval_timestamp: str = None,
+                                    update: bool = None):
+    if source_stac_api_url is not None:
+        query = query.filter(StacIngestionStatus.source_stac_api_url == source_stac_api_url)
+    if time_interval_timestamp is not None:
+        time_start, time_end = process_timestamp.process_timestamp_dual_string(time_interval_timestamp)
+        if time_start is not None:
+            query = query.filter(StacIngestionStatus.time_started >= process_timestamp.to_naive_utc(time_start))
+        if time_end is not None:
+            query = query.filter(StacIngestionStatus.time_started <= process_timestamp.to_naive_utc(time_end))
+    if update is not None:
+        query = query.filter(StacIngestionStatus.update.is_(update))
+    return query
+
+
+def get_all_stac_ingestion_statuses(limit: int = None, cursor: int = None, source_stac_api_url: str = None,
+                                    time_interval_timestamp: str = None, state: str = None,
+                                    update: bool = None) -> Tuple[List[Dict[any, any]], int or None]:
+    """
+    Get a page of stac ingestion statuses, newest first.
+
+    :param limit: Maximum number of statuses to return
+    :param cursor: Cursor returned with the previous page, None for the first page
+    :param source_stac_api_url: Only return statuses of ingestions from this public catalog url
+    :param time_interval_timestamp: Only return statuses of ingestions started in this time interval
+    :param state: Only return statuses of ingestions in this state, one of running, finished or errored
+    :param update: Only return statuses of updates (True) or of first loads (False)
+    :return: Statuses and the cursor of the next page, None if this is the last page
+    """
+    if limit is None:
+        limit = _DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if cursor is not None and cursor < 1:
+        raise ValueError("Invalid cursor")
+    limit = min(limit, _MAX_PAGE_SIZE)
+    query = _filter_stac_ingestion_statuses(StacIngestionStatus.query, source_stac_api_url, time_interval_timestamp,
+                                            update)
+    if state is not None:
+        query = query.filter(_state_condition(state))
+    if cursor is not None:
+        query = query.filter(StacIngestionStatus.id < cursor)
+    a: [StacIngestionStatus] = query.order_by(StacIngestionStatus.id.desc()).limit(limit + 1).all()
+    next_cursor = a[limit - 1].id if len(a) > limit else None
+    return [i.as_dict() for i in a[:limit]], next_cursor
+
+
+def get_stac_ingestion_statuses_summary(source_stac_api_url: str = None, time_interval_timestamp: str = None,
+                                        update: bool = None) -> Dict[str, int]:
+    """
+    Count stac ingestion statuses by state with a single aggregate query.
+
+    :param source_stac_api_url: Only count ingestions from this public catalog url
+    :param time_interval_timestamp: Only count ingestions started in this time interval
+    :param update: Only count updates (True) or first loads (False)
+    :return: Number of running, finished and errored ingestions and their total
+    """
+    query = db.session.query(func.count(), *[func.count().filter(_state_condition(state))
+                                             for state in STAC_INGESTION_STATUS_STATES])
+    query = _filter_stac_ingestion_statuses(query.select_from(StacIngestionStatus), source_stac_api_url,
+                                            time_interval_timestamp, update)
+    total, *counts = query.one()
+    summary = dict(zip(STAC_INGESTION_STATUS_STATES, counts))
+    summary["total"] = total
+    return summary
 
 
 def get_stac_ingestion_status_by_id(id: str) -> Dict[any, any]:
-    _process_stac_ingestion_statuses_redis_list()
     a: StacIngestionStatus = StacIngestionStatus.query.filter_by(id=id).first()
     return a.as_dict()
 
@@ -37,9 +169,149 @@ def make_stac_ingestion_status_entry(source_stac_api_url: str,
     stac_ingestion_status.time_started = datetime.datetime.utcnow()
     db.session.add(stac_ingestion_status)
     db.session.commit()
+    _publish_stac_ingestion_status_events([(stac_ingestion_status.id, "running")])
     return stac_ingestion_status.id
 
 
+def get_ingestion_job_hash(source_stac_api_url: str, target_stac_api_url: str, update: bool,
+                           parameters: Dict[any, any]) -> str:
+    """
+    Hash an ingestion job canonically, so identical jobs hash the same regardless of the order of their parameters.
+    """
+    canonical = json.dumps({"source_stac_api_url": source_stac_api_url, "target_stac_api_url": target_stac_api_url,
+                            "update": update, "parameters": parameters}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def make_coalesced_stac_ingestion_status_entries(entries: List[Tuple[str, str, bool, str]]) -> List[Tuple[int, bool]]:
+    """
+    Create the status entries of several ingestion jobs, reusing the entries of identical jobs which are in flight.
+
+    A job is in flight from the moment its entry is created until its result is applied, or at most
+    STAC_INGESTION_IN_FLIGHT_TTL_SECONDS. Jobs are claimed with SET NX on their hash in Redis, so identical requests
+    racing on different workers still end up with a single job.
+
+    :param entries: Source STAC API url, target STAC API url, update flag and hash of each job
+    :return: Id of the status entry of each job, and whether the job is new and has to be submitted. The id is None
+        for jobs whose source STAC API is not a stored public catalog
+    """
+    ttl = current_app.config["STAC_INGESTION_IN_FLIGHT_TTL_SECONDS"]
+    client = get_redis_client()
+    in_flight: Dict[str, int] = {}
+    claimed: List[str] = []
+    uncoalesced: List[str] = []
+    pending = list(dict.fromkeys(job_hash for _, _, _, job_hash in entries))
+    deadline = time.monotonic() + _IN_FLIGHT_WAIT_SECONDS
+    while pending:
+        pipeline = client.pipeline(transaction=False)
+        for job_hash in pending:
+            pipeline.set(_IN_FLIGHT_KEY_PREFIX + job_hash, _IN_FLIGHT_PENDING, nx=True, ex=ttl)
+        for job_hash in pending:
+            pipeline.get(_IN_FLIGHT_KEY_PREFIX + job_hash)
+        outcome = pipeline.execute()
+        waiting = []
+        for job_hash, won, value in zip(pending, outcome[:len(pending)], outcome[len(pending):]):
+            if won:
+                claimed.append(job_hash)
+            elif value is None or value == _IN_FLIGHT_PENDING:
+                # released in between, or claimed by a request still creating its entry
+                waiting.append(job_hash)
+            else:
+                in_flight[job_hash] = int(value)
+        pending = waiting
+        if pending and time.monotonic() > deadline:
+            logging.warning(f"Gave up waiting for {len(pending)} in flight ingestion jobs, submitting them again")
+            uncoalesced, pending = pending, []
+        elif pending:
+            gevent.sleep(_IN_FLIGHT_POLL_SECONDS)
+
+    to_create = claimed + uncoalesced
+    jobs_by_hash = {job_hash: (source, target, update) for source, target, update, job_hash in entries}
+    try:
+        ids = make_stac_ingestion_status_entries([jobs_by_hash[job_hash] for job_hash in to_create])
+    except Exception:
+        if claimed:
+            client.delete(*[_IN_FLIGHT_KEY_PREFIX + job_hash for job_hash in claimed])
+        raise
+    if claimed:
+        pipeline = client.pipeline(transaction=False)
+        for job_hash, id in zip(claimed, ids):
+            if id is None:
+                pipeline.delete(_IN_FLIGHT_KEY_PREFIX + job_hash)
+                continue
+            pipeline.set(_IN_FLIGHT_KEY_PREFIX + job_hash, id, ex=ttl)
+            pipeline.set(_IN_FLIGHT_CALLBACK_KEY_PREFIX + str(id), job_hash, ex=ttl)
+        pipeline.execute()
+
+    created = dict(zip(to_create, ids))
+    submitted = set()
+    data = []
+    for _, _, _, job_hash in entries:
+        if job_hash in created:
+            data.append((created[job_hash], created[job_hash] is not None and job_hash not in submitted))
+            submitted.add(job_hash)
+        else:
+            data.append((in_flight[job_hash], False))
+    return data
+
+
+def release_in_flight_ingestions(status_ids: List[int]) -> None:
+    """
+    Mark ingestion jobs as no longer in flight, so identical jobs requested later are submitted again.
+
+    :param status_ids: Ids of the status entries of the jobs
+    """
+    if not status_ids:
+        return
+    try:
+        client = get_redis_client()
+        release = client.register_script(_RELEASE_IN_FLIGHT_SCRIPT)
+        pipeline = client.pipeline(transaction=False)
+        for status_id in status_ids:
+            release(keys=[_IN_FLIGHT_CALLBACK_KEY_PREFIX + str(status_id)],
+                    args=[_IN_FLIGHT_KEY_PREFIX, str(status_id)], client=pipeline)
+        pipeline.execute()
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not release in flight ingestion jobs {status_ids}: {e}")
+
+
+def make_stac_ingestion_status_entries(entries: List[Tuple[str, str, bool]]) -> List[Optional[int]]:
+    """
+    Create the status entries of several ingestion jobs in a single transaction.
+
+    Jobs whose source STAC API is not a stored public catalog are skipped, so one of them does not fail the others.
+
+    :param entries: Source STAC API url, target STAC API url and update flag of each job
+    :return: Ids of the created entries in the order of the entries, None for the skipped jobs
+    """
+    if not entries:
+        return []
+    source_stac_api_urls = {source_stac_api_url for source_stac_api_url, _, _ in entries}
+    stored_urls = {url for url, in db.session.query(PublicCatalog.url).filter(
+        PublicCatalog.url.in_(source_stac_api_urls))}
+    for source_stac_api_url in source_stac_api_urls - stored_urls:
+        logging.warning(f"Skipping ingestion jobs of {source_stac_api_url}, it is not a stored public catalog")
+    resolved = [entry for entry in entries if entry[0] in stored_urls]
+    if not resolved:
+        return [None] * len(entries)
+
+    time_started = datetime.datetime.utcnow()
+    statement = insert(StacIngestionStatus).values([
+        {"source_stac_api_url": source_stac_api_url, "target_stac_api_url": target_stac_api_url,
+         "update": update, "time_started": time_started}
+        for source_stac_api_url, target_stac_api_url, update in resolved
+    ]).returning(StacIngestionStatus.id)
+    try:
+        ids = [id for id, in db.session.execute(statement)]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    _publish_stac_ingestion_status_events([(id, "running") for id in ids])
+    created = iter(ids)
+    return [next(created) if entry[0] in stored_urls else None for entry in entries]
+
+
 def set_stac_ingestion_status_entry(
         status_id: int, newly_stored_collections_count: int = 0,
         newly_stored_collections: List[str] = None, updated_collections_count: int = 0,
@@ -67,7 +339,6 @@ def set_stac_ingestion_status_entry(
 
 def remove_stac_ingestion_status_entry(
         status_id: str) -> Tuple[Dict[any, any]]:
-    _process_stac_ingestion_statuses_redis_list()
     a: StacIngestionStatus = StacIngestionStatus.query.filter_by(
         id=status_id).first()
     db.session.delete(a)
@@ -75,34 +346,342 @@ def remove_stac_ingestion_status_entry(
     return a.as_dict()
 
 
-def _process_stac_ingestion_statuses_redis_list():
-    redis_host = current_app.config["REDIS_HOST"]
-    redis_port = current_app.config["REDIS_PORT"]
-    redis_client = redis.Redis(host=redis_host, port=redis_port)
-    microservice_redis_key = "stac_selective_ingester_output_list"
-
-    # while there are elements in the list, loop it
-    while redis_client.llen(microservice_redis_key) > 0:
-        item = redis_client.blpop(microservice_redis_key)
-        if item is not None:
-            _, response = item
-            response_json = json.loads(response)
-            callback_id = response_json['callback_id']
-            # if key called "error" exists, then there was an error
-            if "error" in response_json.keys():
-                error_msg = response_json['error']
-                set_stac_ingestion_status_entry(int(callback_id), error_message=error_msg)
-                continue
-            else:
-                newly_stored_collections = response_json['newly_stored_collections']
-                newly_stored_collections_count = response_json['newly_stored_collections_count']
-                updated_collections_count = response_json['updated_collections_count']
-                updated_collections = response_json['updated_collections']
-                newly_stored_items_count = response_json['newly_stored_items_count']
-                updated_items_count = response_json['updated_items_count']
-                already_stored_items_count = response_json['already_stored_items_count']
-                set_stac_ingestion_status_entry(int(callback_id), newly_stored_collections_count,
-                                                newly_stored_collections,
-                                                updated_collections_count, updated_collections,
-                                                newly_stored_items_count,
-                                                updated_items_count, already_stored_items_count)
+def _parse_stac_ingestion_result(response: bytes) -> Dict[str, any]:
+    """
+    Parse a result message of the ingestion microservice into the fields of its status entry.
+
+    :param response: Raw message from the ingester output list
+    :return: Status entry id and fields to set on it
+    """
+    response_json = json.loads(response)
+    result = {"status_id": int(response_json['callback_id'])}
+    # if key called "error" exists, then there was an error
+    if "error" in response_json.keys():
+        result["error_message"] = response_json['error']
+        return result
+    for key in ("newly_stored_collections", "updated_collections"):
+        result[key] = response_json[key]
+    # counts are validated here, so a malformed result is dropped instead of failing its whole batch over and over
+    for key in ("newly_stored_collections_count", "updated_collections_count", "newly_stored_items_count",
+                "updated_items_count", "already_stored_items_count"):
+        result[key] = int(response_json[key])
+    return result
+
+
+def apply_stac_ingestion_results(results: List[Dict[str, any]]) -> int:
+    """
+    Apply a batch of parsed ingestion results to their status entries in a single transaction.
+
+    Each kind of result is written with one executemany UPDATE. Entries which already finished are left untouched, so
+    applying a result delivered twice is a no-op, and only entries which actually finished get an event.
+
+    :param results: Parsed results as returned by _parse_stac_ingestion_result
+    :return: Number of results applied
+    """
+    if not results:
+        return 0
+    time_finished = datetime.datetime.utcnow()
+    errors = []
+    successes = []
+    for result in results:
+        if "error_message" in result:
+            errors.append({"b_id": result["status_id"], "b_error_message": result["error_message"],
+                           "b_time_finished": time_finished})
+        else:
+            successes.append({
+                "b_id": result["status_id"],
+                "b_newly_stored_collections_count": result["newly_stored_collections_count"],
+                "b_newly_stored_collections": ",".join(result["newly_stored_collections"] or []),
+                "b_updated_collections_count": result["updated_collections_count"],
+                "b_updated_collections": ",".join(result["updated_collections"] or []),
+                "b_newly_stored_items_count": result["newly_stored_items_count"],
+                "b_updated_items_count": result["updated_items_count"],
+                "b_already_stored_items_count": result["already_stored_items_count"],
+                "b_time_finished": time_finished,
+            })
+    unfinished = (StacIngestionStatus.id == bindparam("b_id")) & StacIngestionStatus.time_finished.is_(None)
+    try:
+        # locked until the commit, so exactly these rows are changed by the updates below
+        changed_ids = set(db.session.execute(
+            select(StacIngestionStatus.id).where(
+                StacIngestionStatus.id.in_([result["status_id"] for result in results]),
+                StacIngestionStatus.time_finished.is_(None)
+            ).with_for_update()).scalars())
+        if errors:
+            db.session.execute(update(StacIngestionStatus).where(unfinished).values(
+                error_message=bindparam("b_error_message"),
+                time_finished=bindparam("b_time_finished")
+            ).execution_options(synchronize_session=False), errors)
+        if successes:
+            db.session.execute(update(StacIngestionStatus).where(unfinished).values(
+                newly_stored_collections_count=bindparam("b_newly_stored_collections_count"),
+                newly_stored_collections=bindparam("b_newly_stored_collections"),
+                updated_collections_count=bindparam("b_updated_collections_count"),
+                updated_collections=bindparam("b_updated_collections"),
+                newly_stored_items_count=bindparam("b_newly_stored_items_count"),
+                updated_items_count=bindparam("b_updated_items_count"),
+                already_stored_items_count=bindparam("b_already_stored_items_count"),
+                time_finished=bindparam("b_time_finished")
+            ).execution_options(synchronize_session=False), successes)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    release_in_flight_ingestions([result["status_id"] for result in results])
+    # errors are written first, so they win over a success delivered for the same entry in this batch
+    errored_ids = {error["b_id"] for error in errors}
+    _publish_stac_ingestion_status_events(
+        [(status_id, "errored" if status_id in errored_ids else "finished") for status_id in sorted(changed_ids)])
+    return len(results)
+
+
+def _get_results_processing_key(consumer_id: str) -> str:
+    return f"{_INGESTER_OUTPUT_KEY}:processing:{consumer_id}"
+
+
+def _claim_stac_ingestion_results(redis_client: redis.Redis, consumer_id: str, batch_size: int) -> List[bytes]:
+    # one script, so concurrent consumers never claim the same message twice
+    return redis_client.register_script(_CLAIM_RESULTS_SCRIPT)(
+        keys=[_INGESTER_OUTPUT_KEY, _get_results_processing_key(consumer_id)], args=[batch_size])
+
+
+def _register_results_consumer(redis_client: redis.Redis, consumer_id: str, heartbeat_ttl: int) -> None:
+    redis_client.set(_RESULTS_CONSUMER_HEARTBEAT_KEY_PREFIX + consumer_id, 1, ex=heartbeat_ttl)
+    redis_client.sadd(_RESULTS_CONSUMERS_KEY, consumer_id)
+
+
+def _reclaim_dead_consumers_results(redis_client: redis.Redis) -> None:
+    reclaim = redis_client.register_script(_RECLAIM_RESULTS_SCRIPT)
+    for consumer_id in redis_client.smembers(_RESULTS_CONSUMERS_KEY):
+        consumer_id = consumer_id.decode()
+        if redis_client.exists(_RESULTS_CONSUMER_HEARTBEAT_KEY_PREFIX + consumer_id):
+            continue
+        logging.warning(f"Reclaiming unacknowledged ingestion results of consumer {consumer_id}")
+        reclaim(keys=[_INGESTER_OUTPUT_KEY, _get_results_processing_key(consumer_id)])
+        redis_client.srem(_RESULTS_CONSUMERS_KEY, consumer_id)
+
+
+def process_stac_ingestion_results(consumer_id: str, block_timeout: float = None) -> int:
+    """
+    Claim one batch of results from the ingester output list and apply them to their status entries.
+
+    The batch stays on the processing list of the consumer until it is committed, so a batch which fails to apply is
+    retried by the next call instead of being lost.
+
+    :param consumer_id: Unique id of the consumer, naming its processing list
+    :param block_timeout: Seconds to wait for a result when the list is empty, None to return immediately
+    :return: Number of results claimed
+    """
+    redis_client = get_redis_client()
+    processing_key = _get_results_processing_key(consumer_id)
+    messages = _claim_stac_ingestion_results(redis_client, consumer_id,
+                                             current_app.config["STAC_INGESTION_RESULTS_BATCH_SIZE"])
+    if not messages and block_timeout is not None:
+        # take from the head like the claim script, the ingester pushes results to the tail
+        message = redis_client.blmove(_INGESTER_OUTPUT_KEY, processing_key, block_timeout, src="LEFT", dest="RIGHT")
+        if message is not None:
+            messages = [message]
+    results = []
+    for message in messages:
+        try:
+            results.append(_parse_stac_ingestion_result(message))
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Dropping malformed ingestion result {message!r}: {e}")
+    apply_stac_ingestion_results(results)
+    redis_client.delete(processing_key)
+    return len(messages)
+
+
+def consume_stac_ingestion_results(app: Flask, consumer_id: str = None) -> None:
+    """
+    Apply ingestion results to their status entries as they arrive, forever.
+
+    The consumer keeps a heartbeat in Redis. Results left unacknowledged by consumers whose heartbeat expired are
+    handed back to the output list.
+
+    :param app: Flask app providing the context for the consumer
+    :param consumer_id: Unique id of the consumer, defaults to the host name and process id
+    """
+    block_timeout = app.config["STAC_INGESTION_RESULTS_IDLE_TIMEOUT_SECONDS"]
+    consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}"
+    # long enough to outlast applying a batch
+    heartbeat_ttl = int(block_timeout) * 3 + 60
+    while True:
+        with app.app_context():
+            try:
+                redis_client = get_redis_client()
+                _register_results_consumer(redis_client, consumer_id, heartbeat_ttl)
+                _reclaim_dead_consumers_results(redis_client)
+                if process_stac_ingestion_results(consumer_id, block_timeout):
+                    # the ingester finished jobs, it can take more of the staged ones
+                    ingestion_scheduler_service.dispatch_ingestion_jobs()
+            except Exception as e:
+                logging.error(f"Processing ingestion results failed: {e}")
+                gevent.sleep(block_timeout)
+            finally:
+                db.session.remove()
+
+
+def start_stac_ingestion_results_consumer(app: Flask) -> gevent.Greenlet:
+    """
+    Start a greenlet which applies ingestion results to their status entries as they arrive.
+
+    :param app: Flask app providing the context for the consumer
+    :return: The consumer greenlet
+    """
+    return gevent.spawn(consume_stac_ingestion_results, app)
+
+
+def _publish_stac_ingestion_status_events(events: List[Tuple[int, str]]) -> None:
+    """
+    Publish state transitions of stac ingestions to the event streams of every worker.
+
+    Events are best effort, a client missing one still gets the state from the status endpoints.
+
+    :param events: Status entry id and its new state
+    """
+    if not events:
+        return
+    try:
+        pipeline = get_redis_client().pipeline(transaction=False)
+        for status_id, state in events:
+            pipeline.publish(_STATUS_EVENTS_CHANNEL, json.dumps({"id": status_id, "state": state}))
+        pipeline.execute()
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not publish stac ingestion status events: {e}")
+
+
+def _get_stac_ingestion_state(a: StacIngestionStatus) -> str:
+    if a.time_finished is None:
+        return "running"
+    return "errored" if a.error_message else "finished"
+
+
+def stream_stac_ingestion_status_events(status_id: int = None):
+    """
+    Stream state transitions of stac ingestions as Server-Sent Events.
+
+    The stream of a single ingestion starts with its current state and ends once it is finished. Comment lines are sent
+    as heartbeats while there is nothing to report, which also detects clients which went away.
+
+    :param status_id: Only stream the transitions of this ingestion, None to stream all of them
+    :return: Generator of Server-Sent Event chunks
+    :raises AttributeError: If no ingestion with this id exists
+    """
+    heartbeat_seconds = current_app.config["STAC_INGESTION_EVENTS_HEARTBEAT_SECONDS"]
+    # subscribe before reading the current state, so a transition in between is not lost
+    queue = _status_events_broadcaster.subscribe()
+    initial_event = None
+    try:
+        if status_id is not None:
+            a: StacIngestionStatus = StacIngestionStatus.query.filter_by(id=status_id).first()
+            initial_event = {"id": a.id, "state": _get_stac_ingestion_state(a)}
+    except Exception:
+        _status_events_broadcaster.unsubscribe(queue)
+        raise
+
+    def generate():
+        try:
+            if initial_event is not None:
+                yield f"data: {json.dumps(initial_event)}\n\n"
+                if initial_event["state"] != "running":
+                    return
+            while True:
+                try:
+                    message = queue.get(timeout=heartbeat_seconds)
+                except Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                event = json.loads(message)
+                if status_id is not None and event["id"] != status_id:
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+                if status_id is not None and event["state"] != "running":
+                    return
+        finally:
+            _status_events_broadcaster.unsubscribe(queue)
+
+    return generate()
+
+
+_SUMMARY_COUNT_COLUMNS = ("newly_stored_collections_count", "updated_collections_count", "newly_stored_items_count",
+                          "updated_items_count", "already_stored_items_count")
+
+
+def _compact_stac_ingestion_statuses_batch(cutoff: datetime.datetime, batch_size: int) -> int:
+    status = StacIngestionStatus.__table__
+    summary = StacIngestionStatusDailySummary.__table__
+    ids = select(status.c.id).where(status.c.time_finished.isnot(None), status.c.time_started < cutoff) \
+        .order_by(status.c.id).limit(batch_size).with_for_update(skip_locked=True)
+    ids = [id for id, in db.session.execute(ids)]
+    if not ids:
+        return 0
+
+    day = cast(status.c.time_started, Date)
+    errored = and_(status.c.error_message.isnot(None), status.c.error_message != "")
+    counted_columns = ["ingestions_count", "updates_count", "errored_count", *_SUMMARY_COUNT_COLUMNS]
+    # NULL sources never conflict on the unique constraint, they are merged through their own partial unique index
+    for has_source, index_elements, index_where in (
+            (status.c.source_stac_api_url.isnot(None), [summary.c.day, summary.c.source_stac_api_url], None),
+            (status.c.source_stac_api_url.is_(None), [summary.c.day], summary.c.source_stac_api_url.is_(None))):
+        rollup = select(
+            day, status.c.source_stac_api_url, func.count(),
+            func.count().filter(status.c["update"].is_(True)),
+            func.count().filter(errored),
+            *[func.coalesce(func.sum(status.c[column]), 0) for column in _SUMMARY_COUNT_COLUMNS]
+        ).where(status.c.id.in_(ids), has_source) \
+            .group_by(day, status.c.source_stac_api_url)
+        statement = postgresql.insert(summary).from_select(["day", "source_stac_api_url", *counted_columns], rollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements, index_where=index_where,
+            set_={column: summary.c[column] + statement.excluded[column] for column in counted_columns})
+        db.session.execute(statement)
+    db.session.execute(status.delete().where(status.c.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+
+def compact_stac_ingestion_statuses(retention_days: int = None, batch_size: int = None) -> int:
+    """
+    Roll finished stac ingestion statuses older than the retention window up into daily per-catalog summaries and
+    delete them.
+
+    Rows are compacted in batches, each rolled up and deleted in its own transaction, so the table is never locked for
+    long and an interrupted compaction loses nothing. Running ingestions are kept regardless of their age.
+
+    :param retention_days: Days detailed statuses are kept, defaults to STAC_INGESTION_STATUS_RETENTION_DAYS
+    :param batch_size: Statuses compacted per transaction, defaults to STAC_INGESTION_STATUS_COMPACTION_BATCH_SIZE
+    :return: Number of compacted statuses
+    """
+    if retention_days is None:
+        retention_days = current_app.config["STAC_INGESTION_STATUS_RETENTION_DAYS"]
+    if batch_size is None:
+        batch_size = current_app.config["STAC_INGESTION_STATUS_COMPACTION_BATCH_SIZE"]
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    compacted = 0
+    while True:
+        try:
+            batch = _compact_stac_ingestion_statuses_batch(cutoff, batch_size)
+        except Exception:
+            db.session.rollback()
+            raise
+        compacted += batch
+        if batch < batch_size:
+            break
+    logging.info(f"Compacted {compacted} stac ingestion statuses started before {cutoff}")
+    return compacted
+
+
+def get_stac_ingestion_daily_summaries(source_stac_api_url: str = None) -> List[Dict[any, any]]:
+    """
+    Get the daily per-catalog summaries of compacted stac ingestion statuses, newest first.
+
+    :param source_stac_api_url: Only return summaries of this public catalog url
+    :return: Daily summaries as a list of dictionaries
+    """
+    query = StacIngestionStatusDailySummary.query
+    if source_stac_api_url is not None:
+        query = query.filter(StacIngestionStatusDailySummary.source_stac_api_url == source_stac_api_url)
+    a: [StacIngestionStatusDailySummary] = query.order_by(StacIngestionStatusDailySummary.day.desc(),
+                                                          StacIngestionStatusDailySummary.source_stac_api_url).all()
+    return [i.as_dict() for i in a]
@@ -265,6 +265,23 @@ class StatusReportingDto:
 
 class FileDto:
     api = Namespace("files", description="File upload related operations")
+    sas_tokens = api.model(
+        "sas_tokens",
+        {
+            "filenames": fields.List(
+                fields.String,
+                required=True,
+                description="names of the blobs to sign",
+                example=["item.json", "asset.tif"],
+            ),
+            "permission": fields.String(
+                required=True,
+                description="permission granted by the tokens",
+                enum=["read", "write"],
+                example="write",
+            ),
+        },
+    )
 
 
 class StacDto:
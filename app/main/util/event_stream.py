@@ -0,0 +1,66 @@
+import logging
+import threading
+from typing import Set
+
+import gevent
+import redis
+from gevent.queue import Full, Queue
+
+from .redis_client import get_redis_client
+
+_RECONNECT_DELAY_SECONDS = 1
+
+
+class RedisChannelBroadcaster:
+    """
+    Fan out the messages of a Redis pub/sub channel to any number of local subscribers.
+
+    A single greenlet per process holds the Redis subscription, no matter how many subscribers there are, and puts
+    every message on the queue of each subscriber. It is started with the first subscriber. Subscribers which do not
+    keep up lose messages instead of growing their queue without bound.
+    """
+
+    def __init__(self, channel: str, max_queue_size: int = 100):
+        self.channel = channel
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[Queue] = set()
+        self._listener: gevent.Greenlet = None
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Queue:
+        """
+        Subscribe to the channel.
+
+        :return: Queue receiving the raw messages published on the channel
+        """
+        queue = Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(queue)
+            if self._listener is None or self._listener.dead:
+                self._listener = gevent.spawn(self._listen)
+        return queue
+
+    def unsubscribe(self, queue: Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def _listen(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    with self._lock:
+                        subscribers = list(self._subscribers)
+                    for queue in subscribers:
+                        try:
+                            queue.put_nowait(message["data"])
+                        except Full:
+                            pass
+            except redis.exceptions.RedisError as e:
+                logging.warning(f"Subscription to {self.channel} lost, reconnecting: {e}")
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+            gevent.sleep(_RECONNECT_DELAY_SECONDS)
@@ -0,0 +1,69 @@
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from urllib.parse import urlparse
+
+import gevent
+from flask import current_app, has_app_context
+from gevent.lock import BoundedSemaphore
+
+
+class FanOutResult:
+    """
+    Outcome of a fan-out: results of the calls that finished, errors of the calls that failed and keys of the calls
+    that were cancelled because they missed the deadline.
+    """
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.errors: Dict[Hashable, Exception] = {}
+        self.timed_out: List[Hashable] = []
+
+
+def fan_out(calls: Dict[Hashable, Tuple[str, Callable[[], Any]]], max_concurrency: int, max_per_host: int,
+            deadline: float = None) -> FanOutResult:
+    """
+    Run blocking I/O calls concurrently on greenlets.
+
+    At most ``max_concurrency`` calls run at once, and at most ``max_per_host`` of them against the same host. Calls
+    still running when the deadline expires are killed, and the results gathered so far are returned. Each call runs
+    in its own app context when one is active. The calls only run concurrently when the process is monkey patched
+    by gevent, as it is under pywsgi.py. Otherwise they run one after another, and the deadline is only checked once a
+    blocking call returns.
+
+    :param calls: Mapping of a key to the url the call talks to and the call itself
+    :param max_concurrency: Maximum number of calls running at once
+    :param max_per_host: Maximum number of calls running at once against a single host
+    :param deadline: Seconds after which unfinished calls are cancelled, None to wait for all of them
+    :return: Results, errors and timed out keys of the calls
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    global_semaphore = BoundedSemaphore(max_concurrency)
+    host_semaphores = defaultdict(lambda: BoundedSemaphore(max_per_host))
+    outcome = FanOutResult()
+
+    def run(key: Hashable, url: str, call: Callable[[], Any]):
+        with host_semaphores[urlparse(url).netloc], global_semaphore:
+            try:
+                if app is None:
+                    outcome.results[key] = call()
+                else:
+                    with app.app_context():
+                        outcome.results[key] = call()
+            except Exception as e:
+                outcome.errors[key] = e
+
+    greenlets = {key: gevent.spawn(run, key, url, call) for key, (url, call) in calls.items()}
+    gevent.joinall(list(greenlets.values()), timeout=deadline)
+
+    unfinished = [key for key, greenlet in greenlets.items() if not greenlet.dead]
+    if not unfinished:
+        return outcome
+    # the killed calls only stop once they are next scheduled, so hand back a copy they can not write to anymore
+    finished = FanOutResult()
+    finished.results = {key: value for key, value in outcome.results.items() if key not in unfinished}
+    finished.errors = {key: value for key, value in outcome.errors.items() if key not in unfinished}
+    finished.timed_out = unfinished
+    logging.info(f"Cancelling {len(unfinished)} calls which missed the {deadline}s deadline")
+    gevent.killall([greenlets[key] for key in unfinished], block=False)
+    return finished
@@ -0,0 +1,90 @@
+import threading
+from typing import Any, Mapping, Tuple
+
+import requests
+from flask.app import Flask
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_DEFAULT_POOL_CONNECTIONS = 100
+_DEFAULT_POOL_MAXSIZE = 50
+_DEFAULT_CONNECT_TIMEOUT = 5.0
+_DEFAULT_READ_TIMEOUT = 120.0
+_DEFAULT_MAX_RETRIES = 2
+_DEFAULT_RETRY_BACKOFF_FACTOR = 0.5
+
+_session: requests.Session = None
+_session_lock = threading.Lock()
+
+
+class _PooledSession(requests.Session):
+    """
+    Session applying a default timeout to every request which does not specify its own.
+    """
+
+    def __init__(self, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _make_session(pool_connections: int, pool_maxsize: int, connect_timeout: float, read_timeout: float,
+                  max_retries: int, retry_backoff_factor: float) -> requests.Session:
+    retry = Retry(total=max_retries,
+                  connect=max_retries,
+                  read=max_retries,
+                  status=max_retries,
+                  backoff_factor=retry_backoff_factor,
+                  status_forcelist=(502, 503, 504),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = _PooledSession(timeout=(connect_timeout, read_timeout))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def init_http_session(app: Flask) -> None:
+    """
+    Create the shared outbound HTTP session from the app configuration.
+
+    Connections are kept alive in one pool per host, so repeated calls to the same STAC API, microservice or Azure
+    endpoint reuse their TCP and TLS connections. The pools use gevent-patched locks when the server is monkey
+    patched, which makes the session safe to share between greenlets.
+
+    :param app: Flask app holding the HTTP_* configuration
+    """
+    global _session
+    with _session_lock:
+        _session = _make_session(app.config["HTTP_POOL_CONNECTIONS"], app.config["HTTP_POOL_MAXSIZE"],
+                                 app.config["HTTP_CONNECT_TIMEOUT"], app.config["HTTP_READ_TIMEOUT"],
+                                 app.config["HTTP_MAX_RETRIES"], app.config["HTTP_RETRY_BACKOFF_FACTOR"])
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the shared outbound HTTP session, creating one with default settings if the app has not initialised it.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _make_session(_DEFAULT_POOL_CONNECTIONS, _DEFAULT_POOL_MAXSIZE, _DEFAULT_CONNECT_TIMEOUT,
+                                         _DEFAULT_READ_TIMEOUT, _DEFAULT_MAX_RETRIES, _DEFAULT_RETRY_BACKOFF_FACTOR)
+    return _session
+
+
+def get_http_request_budget(config: Mapping[str, Any]) -> float:
+    """
+    Get the longest a request through the shared session can take, counting every retry and the backoff between them.
+
+    :param config: App configuration holding the HTTP_* settings
+    :return: Seconds
+    """
+    attempts = config["HTTP_MAX_RETRIES"] + 1
+    # urllib3 doubles the backoff after every retry, so the sleeps add up to less than factor * 2 ** retries
+    backoff = config["HTTP_RETRY_BACKOFF_FACTOR"] * 2 ** config["HTTP_MAX_RETRIES"]
+    return attempts * (config["HTTP_CONNECT_TIMEOUT"] + config["HTTP_READ_TIMEOUT"]) + backoff
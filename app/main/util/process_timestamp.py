@@ -3,6 +3,15 @@ import datetime
 from app.main.custom_exceptions import ConvertingTimestampError
 
 
+def to_naive_utc(timestamp: datetime.datetime or None) -> datetime.datetime or None:
+    """
+    Convert a timezone aware datetime object to a naive one in UTC, as stored in the database.
+    """
+    if timestamp is None or timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
 def process_timestamp_dual_string(timestamp: str):
     """
     Process a timestamp string into a tuple of datetime objects.
@@ -0,0 +1,26 @@
+import redis
+from flask.app import Flask
+
+_connection_pool: redis.ConnectionPool = None
+
+
+def init_redis_connection_pool(app: Flask) -> None:
+    """
+    Create the Redis connection pool shared by every Redis client of the process.
+
+    :param app: Flask app holding the REDIS_* configuration
+    """
+    global _connection_pool
+    _connection_pool = redis.BlockingConnectionPool(host=app.config["REDIS_HOST"],
+                                                    port=app.config["REDIS_PORT"],
+                                                    max_connections=app.config["REDIS_MAX_CONNECTIONS"],
+                                                    timeout=app.config["REDIS_POOL_TIMEOUT"])
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a Redis client borrowing its connections from the shared pool.
+    """
+    if _connection_pool is None:
+        raise RuntimeError("Redis connection pool is not initialised, call init_redis_connection_pool first")
+    return redis.Redis(connection_pool=_connection_pool)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+import requests
+
+
+class _CachedResponse:
+    __slots__ = ("status_code", "content", "etag", "last_modified", "expires_at")
+
+    def __init__(self, status_code: int, content: bytes, etag: str, last_modified: str, expires_at: float):
+        self.status_code = status_code
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of upstream GET responses keyed by url.
+
+    Entries are served without contacting the upstream for ``ttl`` seconds. Expired entries are revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged resource costs a 304 instead of a full download. Only 200
+    responses are cached, and the cache is bounded both by number of entries and by total body size.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entries: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CachedResponse] = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, session: requests.Session) -> Tuple[int, bytes]:
+        """
+        Get a response body from the cache, fetching or revalidating it with the session when needed.
+
+        :param url: Upstream url
+        :param session: Session used to contact the upstream
+        :return: Status code and body of the response
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            generation = self._generation
+        now = time.monotonic()
+        if entry is not None and entry.expires_at > now:
+            return entry.status_code, entry.content
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        response = session.get(url, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            entry.expires_at = time.monotonic() + self.ttl
+            return entry.status_code, entry.content
+        if response.status_code == 200:
+            self._store(url, generation, _CachedResponse(response.status_code, response.content,
+                                                         response.headers.get("ETag"),
+                                                         response.headers.get("Last-Modified"),
+                                                         time.monotonic() + self.ttl))
+        else:
+            # only drop this entry, an invalidation would also discard the responses of other urls in flight
+            with self._lock:
+                self._remove(url)
+        return response.status_code, response.content
+
+    def invalidate(self, url: str) -> None:
+        """
+        Remove the cached response for exactly this url.
+        """
+        with self._lock:
+            self._generation += 1
+            self._remove(url)
+
+    def invalidate_tree(self, url: str) -> None:
+        """
+        Remove the cached responses for this url and every url below it, including ones with a query string.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries
+                        if key == url or key.startswith(url + "/") or key.startswith(url + "?")]:
+                self._remove(key)
+
+    def _store(self, url: str, generation: int, entry: _CachedResponse) -> None:
+        if len(entry.content) > self.max_bytes:
+            return
+        with self._lock:
+            # an invalidation happened while the response was in flight, it may already be stale
+            if generation != self._generation:
+                return
+            self._remove(url)
+            self._entries[url] = entry
+            self._size += len(entry.content)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+    def _remove(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry.content)
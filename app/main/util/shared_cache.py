@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+import redis
+from cachetools import TTLCache
+
+from .redis_client import get_redis_client
+
+
+class SharedCache:
+    """
+    Two tier cache shared by every worker and replica: a short lived in-process L1 in front of Redis.
+
+    Values younger than ``fresh_ttl`` are served as they are. Older values are kept in Redis for ``stale_ttl``
+    seconds and served stale while a single worker, holding a Redis lock, refreshes them. On a complete miss the
+    workers that did not get the lock wait for the lock holder to publish the value instead of all loading it.
+    Values must be JSON serialisable. If Redis is unavailable the loader is called directly.
+    """
+
+    def __init__(self, namespace: str, fresh_ttl: float, stale_ttl: float, l1_ttl: float, l1_maxsize: int = 1024,
+                 lock_timeout: float = 60):
+        self.namespace = namespace
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        self.lock_timeout = lock_timeout
+        self._l1 = TTLCache(maxsize=l1_maxsize, ttl=min(l1_ttl, fresh_ttl))
+        self._l1_lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value from the cache, loading it with the loader when it is missing or stale.
+
+        :param key: Cache key, unique within the namespace
+        :param loader: Callable producing the value
+        :return: The cached or freshly loaded value
+        """
+        with self._l1_lock:
+            if key in self._l1:
+                return self._l1[key]
+
+        try:
+            client = get_redis_client()
+            entry = self._read(client, key)
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Shared cache {self.namespace} unavailable, loading {key} directly: {e}")
+            return loader()
+
+        if entry is not None and time.time() - entry["fetched_at"] < self.fresh_ttl:
+            self._store_l1(key, entry["value"])
+            return entry["value"]
+
+        lock = client.lock(self._redis_key(key) + ":lock", timeout=self.lock_timeout, blocking=False)
+        if lock.acquire():
+            try:
+                return self._load(client, key, loader, entry)
+            finally:
+                try:
+                    lock.release()
+                except redis.exceptions.LockError:
+                    pass
+
+        if entry is not None:
+            return entry["value"]
+        return self._wait_for_value(client, key, loader)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value loaded outside the cache, so it is served fresh for ``fresh_ttl`` seconds.
+        """
+        self._store_l1(key, value)
+        try:
+            get_redis_client().set(self._redis_key(key), json.dumps({"fetched_at": time.time(), "value": value}),
+                                   ex=int(self.stale_ttl))
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Shared cache {self.namespace} unavailable, could not store {key}: {e}")
+
+    def invalidate(self, key: str) -> None:
+        """
+        Remove a value from the local L1 and from Redis.
+        """
+        with self._l1_lock:
+            self._l1.pop(key, None)
+        try:
+            get_redis_client().delete(self._redis_key(key))
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"Shared cache {self.namespace} unavailable, could not invalidate {key}: {e}")
+
+    def _load(self, client: redis.Redis, key: str, loader: Callable[[], Any], stale_entry: dict or None) -> Any:
+        try:
+            value = loader()
+        except Exception as e:
+            if stale_entry is None:
+                raise
+            logging.info(f"Refreshing {key} in shared cache {self.namespace} failed, serving stale value: {e}")
+            return stale_entry["value"]
+        client.set(self._redis_key(key), json.dumps({"fetched_at": time.time(), "value": value}),
+                   ex=int(self.stale_ttl))
+        self._store_l1(key, value)
+        return value
+
+    def _wait_for_value(self, client: redis.Redis, key: str, loader: Callable[[], Any]) -> Any:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            entry = self._read(client, key)
+            if entry is not None:
+                self._store_l1(key, entry["value"])
+                return entry["value"]
+            if not client.exists(self._redis_key(key) + ":lock"):
+                # the lock holder failed to load the value
+                break
+        return loader()
+
+    def _read(self, client: redis.Redis, key: str) -> dict or None:
+        raw = client.get(self._redis_key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def _store_l1(self, key: str, value: Any) -> None:
+        with self._l1_lock:
+            self._l1[key] = value
+
+    def _redis_key(self, key: str) -> str:
+        return f"stac_portal:cache:{self.namespace}:{key}"
@@ -3,22 +3,17 @@ import os
 from flask_cli import FlaskGroup
 from flask_cors import CORS
 from flask_migrate import Migrate
-from gevent.threadpool import ThreadPool
-import multiprocessing
 import logging
 logging.basicConfig(level=logging.INFO)
 
 from app import blueprint
 from app.main import create_app, db
+from app.main.service.public_catalogs_service import backfill_search_parameters_hashes
+from app.main.service.public_collections_service import harvest_all_public_catalogs
+from app.main.service.status_reporting_service import compact_stac_ingestion_statuses, consume_stac_ingestion_results
 
 app = create_app()
-_num_workers = multiprocessing.cpu_count() * 100
-if _num_workers > 1000:
-    _num_workers = 1000
-logging.info(f"Set number of gevent greenlets to {_num_workers}")
-_pool = ThreadPool(_num_workers)
 app.register_blueprint(blueprint)
-app.pool = _pool
 app.app_context().push()
 CORS(app, resources={r"/*": {"origins": "*"}})
 cli = FlaskGroup(app)
@@ -28,6 +23,32 @@ migrate.init_app(app, db)
 FLASK_APP = "manage.py"
 
 
+@app.cli.command("harvest-public-collections")
+def harvest_public_collections():
+    """Harvest the collections of all public catalogs.
+
+    The flask CLI is not monkey patched by gevent, so catalogs are fetched one after another and
+    PUBLIC_COLLECTIONS_HARVEST_DEADLINE_SECONDS is only checked between them. The harvester in pywsgi.py fetches them
+    concurrently.
+    """
+    harvest_all_public_catalogs()
+
+
+@app.cli.command("backfill-search-parameters-hashes")
+def backfill_search_parameters_hashes_command():
+    backfill_search_parameters_hashes()
+
+
+@app.cli.command("consume-ingestion-results")
+def consume_ingestion_results():
+    consume_stac_ingestion_results(app)
+
+
+@app.cli.command("compact-ingestion-statuses")
+def compact_ingestion_statuses():
+    compact_stac_ingestion_statuses()
+
+
 def run():
     db.create_all()
     app.run(host='0.0.0.0', port=5000)
@@ -6,6 +6,16 @@ from gevent.pywsgi import WSGIServer
 monkey.patch_all()
 
 from manage import app
+from app.main.aad.aadtoken import start_jwks_refresher
+from app.main.service.public_collections_service import start_public_collections_harvester
+from app.main.service.ingestion_scheduler_service import start_ingestion_dispatcher
+from app.main.service.status_reporting_service import start_stac_ingestion_results_consumer
+
+start_public_collections_harvester(app)
+start_stac_ingestion_results_consumer(app)
+start_ingestion_dispatcher(app)
+if app.config["AD_ENABLE_AUTH"]:
+    start_jwks_refresher(app)
 
 http_server = WSGIServer(('0.0.0.0', 5001), app)
 http_server.serve_forever()
\ No newline at end of file
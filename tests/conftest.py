@@ -0,0 +1,38 @@
+import os
+
+# the configuration is read when the app package is imported, so it has to be in place before any test imports it
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("REDIS_PORT", "6379")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASS", "postgres")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+os.environ.setdefault("POSTGRES_DBNAME", "stac_portal")
+os.environ.setdefault("AD_ENABLE_AUTH", "False")
+os.environ.setdefault("AZURE_STORAGE_CONNECTION_STRING",
+                      "DefaultEndpointsProtocol=https;AccountName=stacportal;AccountKey=a2V5a2V5a2V5a2V5==;"
+                      "EndpointSuffix=core.windows.net")
+os.environ.setdefault("AZURE_STORAGE_BLOB_NAME_FOR_STAC_ITEMS", "stac-items")
+
+import fakeredis
+import pytest
+
+from app import blueprint
+from app.main import create_app
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.register_blueprint(blueprint)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
@@ -0,0 +1,63 @@
+import gevent
+from flask import current_app
+
+from app.main.util.fan_out import fan_out
+
+
+def _sleep_and_return(seconds, value):
+    def call():
+        gevent.sleep(seconds)
+        return value
+
+    return call
+
+
+def test_results_and_errors_are_collected():
+    def fail():
+        raise ValueError("bad catalog")
+
+    outcome = fan_out({"a": ("http://a", lambda: 1), "b": ("http://b", fail)}, max_concurrency=10, max_per_host=2)
+
+    assert outcome.results == {"a": 1}
+    assert isinstance(outcome.errors["b"], ValueError)
+    assert outcome.timed_out == []
+
+
+def test_calls_missing_the_deadline_are_cancelled():
+    outcome = fan_out({"fast": ("http://a", _sleep_and_return(0, "fast")),
+                       "slow": ("http://b", _sleep_and_return(0.5, "slow"))},
+                      max_concurrency=10, max_per_host=2, deadline=0.1)
+
+    assert outcome.results == {"fast": "fast"}
+    assert outcome.timed_out == ["slow"]
+
+
+def test_cancelled_calls_do_not_change_the_returned_outcome():
+    outcome = fan_out({"slow": ("http://a", _sleep_and_return(0.2, "slow"))},
+                      max_concurrency=10, max_per_host=2, deadline=0.1)
+    gevent.sleep(0.3)
+
+    assert outcome.results == {}
+    assert outcome.errors == {}
+    assert outcome.timed_out == ["slow"]
+
+
+def test_concurrency_per_host_is_bounded():
+    running = {"now": 0, "max": 0}
+
+    def call():
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        gevent.sleep(0.01)
+        running["now"] -= 1
+
+    fan_out({i: (f"http://same-host/catalog/{i}", call) for i in range(10)}, max_concurrency=10, max_per_host=3)
+
+    assert running["max"] == 3
+
+
+def test_calls_run_in_app_context(app):
+    with app.app_context():
+        outcome = fan_out({"a": ("http://a", lambda: current_app.name)}, max_concurrency=1, max_per_host=1)
+
+    assert outcome.results == {"a": app.name}
@@ -0,0 +1,59 @@
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.main.controller import file_controller
+from app.main.service import file_service
+
+BLOB_NAME = "scenes/2023 01/item #1+ü.tif"
+
+
+@pytest.fixture(autouse=True)
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+def test_blob_url_is_quoted():
+    _, endpoint, endpoint_without_sas_token = file_service.get_write_sas_token(BLOB_NAME)
+
+    assert endpoint_without_sas_token == "https://stacportal.blob.core.windows.net/stac-items/" \
+                                         "scenes/2023%2001/item%20%231%2B%C3%BC.tif"
+    assert endpoint.startswith(endpoint_without_sas_token + "?")
+
+
+@pytest.mark.parametrize("with_sas_token", [True, False])
+def test_read_token_for_returned_url_signs_the_same_blob(with_sas_token):
+    _, endpoint, endpoint_without_sas_token = file_service.get_write_sas_token("item #1+ü.tif")
+
+    _, read_endpoint, read_endpoint_without_sas_token = file_service.get_read_sas_token(
+        endpoint if with_sas_token else endpoint_without_sas_token)
+
+    assert read_endpoint_without_sas_token == endpoint_without_sas_token
+    assert parse_qs(urlsplit(read_endpoint).query)["sp"] == ["r"]
+
+
+def test_batch_read_tokens_accept_urls_and_names():
+    _, endpoint, _ = file_service.get_write_sas_token("item #1.tif")
+
+    tokens = file_service.get_sas_tokens([endpoint, "item 2.tif"], file_service.SAS_PERMISSION_READ)
+
+    assert [token["filename"] for token in tokens] == ["item #1.tif", "item 2.tif"]
+    assert tokens[0]["endpoint_without_sas_token"].endswith("/stac-items/item%20%231.tif")
+
+
+def test_unknown_permission_is_rejected():
+    with pytest.raises(ValueError):
+        file_service.get_sas_tokens(["item.tif"], "delete")
+
+
+@pytest.mark.parametrize("roles, status_code", [(["StacPortal.Viewer"], 401),
+                                                (["StacPortal.Viewer", "StacPortal.Creator"], 200)])
+def test_batch_write_tokens_need_creator_role(app, client, monkeypatch, roles, status_code):
+    monkeypatch.setitem(app.config, "AD_ENABLE_AUTH", True)
+    with mock.patch.object(file_controller.auth_decorator, "auth_token", return_value={"roles": roles}):
+        response = client.post("/file/sas_tokens/", json={"filenames": ["item.tif"], "permission": "write"},
+                               headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == status_code
@@ -0,0 +1,48 @@
+from unittest import mock
+
+import pytest
+
+from app.main.controller import public_catalogs_contoller
+
+CATALOGS_URL = "/public_catalogs/"
+
+
+@pytest.fixture
+def get_catalogs():
+    with mock.patch.object(public_catalogs_contoller.public_catalogs_service, "get_all_stored_public_catalogs",
+                           return_value=[]) as m:
+        yield m
+
+
+def test_all_catalogs_are_returned_without_paging(client, get_catalogs):
+    assert client.get(CATALOGS_URL).status_code == 200
+    get_catalogs.assert_called_once_with(None, None, None, True)
+
+
+def test_page_is_passed_on(client, get_catalogs):
+    assert client.get(CATALOGS_URL + "?page=3&per_page=20").status_code == 200
+    get_catalogs.assert_called_once_with(3, 20, None, True)
+
+
+def test_per_page_without_page_returns_first_page(client, get_catalogs):
+    assert client.get(CATALOGS_URL + "?per_page=20").status_code == 200
+    get_catalogs.assert_called_once_with(1, 20, None, True)
+
+
+@pytest.mark.parametrize("query", ["page=2", "page=0&per_page=20", "page=1&per_page=0", "per_page=-1",
+                                   "page=one&per_page=20", "page=1&per_page=twenty"])
+def test_invalid_paging_is_rejected(client, get_catalogs, query):
+    assert client.get(CATALOGS_URL + "?" + query).status_code == 400
+    get_catalogs.assert_not_called()
+
+
+def test_fields_are_passed_on(client, get_catalogs):
+    response = client.get(CATALOGS_URL + "?fields=id, name&include_search_parameters=false")
+
+    assert response.status_code == 200
+    get_catalogs.assert_called_once_with(None, None, ["id", "name"], False)
+
+
+def test_unknown_field_is_rejected(client, get_catalogs):
+    assert client.get(CATALOGS_URL + "?fields=id,password").status_code == 400
+    get_catalogs.assert_not_called()
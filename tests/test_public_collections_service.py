@@ -0,0 +1,33 @@
+import shapely.wkt
+
+from app.main.service.public_collections_service import _spatial_extent_wkt
+
+
+def _collection(*bboxes):
+    return {"extent": {"spatial": {"bbox": list(bboxes)}}}
+
+
+def test_spatial_extent_keeps_regular_bbox():
+    geometry = shapely.wkt.loads(_spatial_extent_wkt(_collection([-10, -20, 30, 40])))
+
+    assert len(geometry.geoms) == 1
+    assert geometry.bounds == (-10, -20, 30, 40)
+
+
+def test_spatial_extent_splits_bbox_crossing_antimeridian():
+    geometry = shapely.wkt.loads(_spatial_extent_wkt(_collection([170, -10, -170, 10])))
+
+    assert sorted(polygon.bounds for polygon in geometry.geoms) == [(-180, -10, -170, 10), (170, -10, 180, 10)]
+
+
+def test_spatial_extent_flattens_3d_bbox():
+    geometry = shapely.wkt.loads(_spatial_extent_wkt(_collection([170, -10, 0, -170, 10, 100])))
+
+    assert sorted(polygon.bounds for polygon in geometry.geoms) == [(-180, -10, -170, 10), (170, -10, 180, 10)]
+    assert not geometry.has_z
+
+
+def test_spatial_extent_keeps_every_bbox():
+    geometry = shapely.wkt.loads(_spatial_extent_wkt(_collection([-180, -90, 180, 90], [0, 0, 1, 1])))
+
+    assert len(geometry.geoms) == 2
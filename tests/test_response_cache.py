@@ -0,0 +1,90 @@
+from unittest import mock
+
+from app.main.util.response_cache import ResponseCache
+
+
+class _Session:
+    def __init__(self, responses, on_get=None):
+        self.responses = responses
+        self.on_get = on_get
+        self.calls = []
+
+    def get(self, url, headers=None):
+        self.calls.append((url, headers))
+        if self.on_get is not None:
+            self.on_get()
+        return self.responses[url].pop(0)
+
+
+def _response(status_code, content=b"", etag=None):
+    response = mock.Mock(status_code=status_code, content=content)
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+
+def test_fresh_response_is_served_from_cache():
+    cache = ResponseCache(ttl=60, max_bytes=1024, max_entries=10)
+    session = _Session({"http://stac/a": [_response(200, b"a")]})
+
+    assert cache.get("http://stac/a", session) == (200, b"a")
+    assert cache.get("http://stac/a", session) == (200, b"a")
+    assert len(session.calls) == 1
+
+
+def test_expired_response_is_revalidated():
+    cache = ResponseCache(ttl=0, max_bytes=1024, max_entries=10)
+    session = _Session({"http://stac/a": [_response(200, b"a", etag='"1"'), _response(304)]})
+
+    cache.get("http://stac/a", session)
+
+    assert cache.get("http://stac/a", session) == (200, b"a")
+    assert session.calls[1][1] == {"If-None-Match": '"1"'}
+
+
+def test_response_fetched_across_an_invalidation_is_not_cached():
+    cache = ResponseCache(ttl=60, max_bytes=1024, max_entries=10)
+    session = _Session({"http://stac/a": [_response(200, b"old"), _response(200, b"new")]},
+                       on_get=lambda: cache.invalidate("http://stac/a"))
+
+    cache.get("http://stac/a", session)
+    session.on_get = None
+
+    assert cache.get("http://stac/a", session) == (200, b"new")
+    assert len(session.calls) == 2
+
+
+def test_invalidate_tree_removes_urls_below():
+    cache = ResponseCache(ttl=60, max_bytes=1024, max_entries=10)
+    urls = ["http://stac/collections", "http://stac/collections/a/items?limit=1", "http://stac/collectionsx"]
+    session = _Session({url: [_response(200, b"1"), _response(200, b"2")] for url in urls})
+    for url in urls:
+        cache.get(url, session)
+
+    cache.invalidate_tree("http://stac/collections")
+
+    assert [cache.get(url, session)[1] for url in urls] == [b"2", b"2", b"1"]
+
+
+def test_error_response_only_removes_its_own_entry():
+    cache = ResponseCache(ttl=0, max_bytes=1024, max_entries=10)
+    session = _Session({"http://stac/a": [_response(200, b"a"), _response(500, b"error")],
+                        "http://stac/b": [_response(200, b"b")]})
+    cache.get("http://stac/b", session)
+
+    cache.get("http://stac/a", session)
+    assert cache.get("http://stac/a", session) == (500, b"error")
+
+    assert "http://stac/a" not in cache._entries
+    assert "http://stac/b" in cache._entries
+
+
+def test_cache_is_bounded_by_size():
+    cache = ResponseCache(ttl=60, max_bytes=5, max_entries=10)
+    session = _Session({"http://stac/a": [_response(200, b"aaa")], "http://stac/b": [_response(200, b"bbb")],
+                        "http://stac/c": [_response(200, b"cccccc")]})
+
+    cache.get("http://stac/a", session)
+    cache.get("http://stac/b", session)
+    cache.get("http://stac/c", session)
+
+    assert list(cache._entries) == ["http://stac/b"]
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+
+import pytest
+import redis
+
+from app.main.util import shared_cache
+from app.main.util.http_client import get_http_request_budget
+from app.main.util.shared_cache import SharedCache
+
+REDIS_KEY = "stac_portal:cache:listings:catalog"
+
+
+@pytest.fixture(autouse=True)
+def redis_client(redis_client, monkeypatch):
+    monkeypatch.setattr(shared_cache, "get_redis_client", lambda: redis_client)
+    return redis_client
+
+
+def _cache(**kwargs):
+    return SharedCache("listings", **{"fresh_ttl": 60, "stale_ttl": 600, "l1_ttl": 10, "lock_timeout": 2, **kwargs})
+
+
+def _store(redis_client, value, age):
+    redis_client.set(REDIS_KEY, json.dumps({"fetched_at": time.time() - age, "value": value}))
+
+
+def _loader(value, calls):
+    def load():
+        calls.append(value)
+        return value
+
+    return load
+
+
+def test_miss_is_loaded_once_and_shared():
+    calls = []
+
+    assert _cache().get("catalog", _loader([1], calls)) == [1]
+    assert _cache().get("catalog", _loader([2], calls)) == [1]
+    assert calls == [[1]]
+
+
+def test_stale_value_is_refreshed_by_lock_holder(redis_client):
+    _store(redis_client, "old", age=120)
+    calls = []
+
+    assert _cache().get("catalog", _loader("new", calls)) == "new"
+    assert calls == ["new"]
+    assert not redis_client.exists(REDIS_KEY + ":lock")
+
+
+def test_stale_value_is_served_while_another_worker_refreshes(redis_client):
+    _store(redis_client, "old", age=120)
+    redis_client.set(REDIS_KEY + ":lock", "other worker")
+    calls = []
+
+    assert _cache().get("catalog", _loader("new", calls)) == "old"
+    assert calls == []
+
+
+def test_stale_value_is_served_when_refresh_fails(redis_client):
+    _store(redis_client, "old", age=120)
+
+    def fail():
+        raise IOError("catalog down")
+
+    assert _cache().get("catalog", fail) == "old"
+
+
+def test_miss_waits_for_lock_holder_to_publish(redis_client):
+    redis_client.set(REDIS_KEY + ":lock", "other worker")
+    threading.Timer(0.3, _store, (redis_client, "published", 0)).start()
+    calls = []
+
+    assert _cache().get("catalog", _loader("own", calls)) == "published"
+    assert calls == []
+
+
+def test_miss_is_loaded_when_lock_holder_gives_up(redis_client):
+    redis_client.set(REDIS_KEY + ":lock", "other worker")
+    threading.Timer(0.3, redis_client.delete, (REDIS_KEY + ":lock",)).start()
+    calls = []
+
+    assert _cache().get("catalog", _loader("own", calls)) == "own"
+    assert calls == ["own"]
+
+
+def test_lock_is_held_for_the_whole_load(redis_client):
+    ttls = []
+
+    def load():
+        ttls.append(redis_client.ttl(REDIS_KEY + ":lock"))
+        return "value"
+
+    _cache(lock_timeout=377).get("catalog", load)
+
+    assert 370 < ttls[0] <= 377
+
+
+def test_loader_is_called_directly_without_redis(monkeypatch):
+    def unavailable():
+        raise redis.exceptions.ConnectionError("no redis")
+
+    monkeypatch.setattr(shared_cache, "get_redis_client", unavailable)
+    calls = []
+
+    assert _cache().get("catalog", _loader("value", calls)) == "value"
+    assert calls == ["value"]
+
+
+def test_set_value_is_served_fresh():
+    _cache().set("catalog", "harvested")
+
+    assert _cache().get("catalog", _loader("loaded", [])) == "harvested"
+
+
+def test_http_request_budget_covers_every_retry():
+    config = {"HTTP_CONNECT_TIMEOUT": 5, "HTTP_READ_TIMEOUT": 120, "HTTP_MAX_RETRIES": 2,
+              "HTTP_RETRY_BACKOFF_FACTOR": 0.5}
+
+    assert get_http_request_budget(config) == 3 * 125 + 2
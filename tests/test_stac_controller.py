@@ -0,0 +1,61 @@
+from unittest import mock
+
+import pytest
+
+from app.main.controller import stac_controller
+
+ITEMS_URL = "/stac/collections/sentinel-2/items/"
+
+
+@pytest.fixture
+def get_items():
+    with mock.patch.object(stac_controller, "get_items_by_collection_id", return_value={"features": []}) as m:
+        yield m
+
+
+def test_items_are_requested_with_limit_and_bbox(client, get_items):
+    response = client.get(ITEMS_URL + "?limit=10&bbox=-10,-20,30,40")
+
+    assert response.status_code == 200
+    get_items.assert_called_once_with("sentinel-2", limit=10, token=None, bbox="-10,-20,30,40", datetime=None)
+
+
+@pytest.mark.parametrize("query", ["limit=ten", "limit=0", "limit=-5", "limit=1.5"])
+def test_invalid_limit_is_rejected(client, get_items, query):
+    response = client.get(ITEMS_URL + "?" + query)
+
+    assert response.status_code == 400
+    assert response.json == {"message": "limit must be a positive integer"}
+    get_items.assert_not_called()
+
+
+@pytest.mark.parametrize("bbox", ["1,2,3", "1,2,3,4,5", "a,b,c,d", ""])
+def test_invalid_bbox_is_rejected(client, get_items, bbox):
+    response = client.get(ITEMS_URL + "?bbox=" + bbox)
+
+    assert response.status_code == 400
+    get_items.assert_not_called()
+
+
+def test_3d_bbox_is_accepted(client, get_items):
+    assert client.get(ITEMS_URL + "?bbox=1,2,0,3,4,100").status_code == 200
+
+
+def test_unknown_format_is_rejected(client):
+    with mock.patch.object(stac_controller, "stream_items_by_collection_id") as stream_items:
+        response = client.get(ITEMS_URL + "?all_pages=true&format=csv")
+
+    assert response.status_code == 400
+    assert response.json == {"message": "format must be one of geojson,ndjson"}
+    stream_items.assert_not_called()
+
+
+def test_items_are_streamed_as_ndjson(client):
+    with mock.patch.object(stac_controller, "stream_items_by_collection_id",
+                           return_value=iter(['{"id": "a"}\n'])) as stream_items:
+        response = client.get(ITEMS_URL + "?all_pages=true&format=ndjson&limit=100")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.data == b'{"id": "a"}\n'
+    stream_items.assert_called_once_with("sentinel-2", limit=100, bbox=None, datetime=None, output_format="ndjson")
@@ -0,0 +1,41 @@
+from unittest import mock
+
+import pytest
+
+from app.main.controller import status_reporting_controller
+
+STATUSES_URL = "/status_reporting/loading_public_stac_records/"
+
+
+def test_next_cursor_is_returned_in_header(client):
+    with mock.patch.object(status_reporting_controller.status_reporting_service, "get_all_stac_ingestion_statuses",
+                           return_value=([{"id": 42}], 42)) as get_statuses:
+        response = client.get(STATUSES_URL + "?limit=1&cursor=50&state=running&update=true")
+
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == "42"
+    get_statuses.assert_called_once_with(limit=1, cursor=50, source_stac_api_url=None, time_interval_timestamp=None,
+                                         state="running", update=True)
+
+
+def test_last_page_has_no_cursor_header(client):
+    with mock.patch.object(status_reporting_controller.status_reporting_service, "get_all_stac_ingestion_statuses",
+                           return_value=([], None)):
+        response = client.get(STATUSES_URL)
+
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("query", ["limit=many", "limit=0", "cursor=abc", "cursor=0", "state=paused",
+                                   "datetime=yesterday"])
+def test_invalid_paging_and_filters_are_rejected(app, client, query):
+    # reading the query property of a model needs an app context
+    with app.app_context(), \
+            mock.patch.object(status_reporting_controller.status_reporting_service.StacIngestionStatus, "query") \
+            as statuses:
+        statuses.filter.return_value = statuses
+        response = client.get(STATUSES_URL + "?" + query)
+
+    assert response.status_code == 400
+    statuses.order_by.assert_not_called()